@@ -0,0 +1,507 @@
+import argparse
+import collections
+import contextlib
+import functools
+import hashlib
+import http.server
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仓库根目录，引用iptv公共模块
+from iptv import CACHE_DIR
+from iptv import t2s
+from iptv.category import CategoryIndex
+from iptv.dispatch import Dispatcher
+from iptv.m3u import M3U_HEADER, render_m3u_entries
+from iptv.normalize import FULLWIDTH_TABLE, clean_channel_name, normalize_channel_name, _process_name_part
+from iptv.pipeline import (ALL_SECTIONS, CHANNEL_CATEGORIES, SIMPLE_SECTIONS, category_items, iter_sections,
+                           load_category_dictionaries, load_corrections, parse_channel_lines)
+from iptv.playlist import PlaylistReader
+from iptv.publish import publish, render_txt
+
+# 性能基准：按 主频道/地方台 字典里的频道名生成1万~100万行的m3u、txt直播源，
+# 分别计时 解析（PlaylistReader）、清理（clean_channel_name+繁转简）、分发（Dispatcher）、
+# 组装（按瘦身版、全集版各段落的设置纠错/去重/排序）、写出（txt+m3u）几个阶段，结果存成JSON，可以和保存的基线比较。
+# --golden 用仓库里的快照源跑一遍main.py，检查live.txt和记录的结果逐字节一致（更新时间和每日一首两行除外）。
+# golden.json是在加了并发下载、缓存、增量构建等改动之后的代码上记录的，不是最初的main.py，
+# 它用来保证之后的改动不再改变输出。
+# --diff-base 用同一份快照分别跑最初的main.py（BASE_COMMIT）和当前代码，比较两份live.txt，只允许KNOWN_DIFFERENCES里的差别
+# 在仓库根目录运行：python assets/benchmark/benchmark.py [--sizes 10000,100000] [--golden] [--diff-base]
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+GOLDEN_FILE = os.path.join(BENCHMARK_DIR, 'golden.json')
+RESULT_FILE = os.path.join(CACHE_DIR, 'benchmark.json')
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+STAGES = ["parse", "normalize", "classify", "assemble", "write"]
+
+# 比基线慢这么多倍算退化
+REGRESSION_THRESHOLD = 1.25
+
+GOLDEN_SNAPSHOT = 'assets/snapshot/2024-11-09(M)'
+BASE_COMMIT = 'a4939ba'  # 优化之前的代码
+# 和最初的main.py相比有意改变的输出，--diff-base 比较时按这些规则处理，其余差别都算不一致
+KNOWN_DIFFERENCES = [
+    "频道名里的全角字母、数字、＋－转成半角，按转换后的名称排序；CCTV5＋原来整理成CCTV5，现在是CCTV5+",
+    "纠错表里的别名按纠错后的名称归类，原来落到others的行多出来（如宁波TV5归入浙江频道）",
+    "原来set()去重的分区改成按第一次出现的顺序去重，同一个字典位置内的先后不同",
+]
+# main.py读的输入，golden记录它们的hash，输入变了要在已经通过检查的代码上（改动之前）重新记录
+GOLDEN_INPUTS = ['主频道', '地方台', '专区', 'assets/corrections_name.txt', 'assets/logo.txt',
+                 'assets/今日推荐.txt', 'assets/blacklist1/blacklist_auto.txt',
+                 'assets/blacklist1/blacklist_manual.txt', 'assets/blacklist1/whitelist_auto.txt']
+
+
+# 分类配置、字典、纠错表都和main.py一样，直接从流程模块取
+def load_categories():
+    dictionaries = load_category_dictionaries()
+    return [(key, dictionaries[key], keyword) for key, _, keyword in CHANNEL_CATEGORIES]
+
+
+################# 生成直播源
+# 频道名按字典里的名称取，排名靠前的出现得多（Zipf分布）；再加上直播源里常见的写法：
+# 高清/HD后缀、繁体、全角数字、纠错表里的别名，以及字典里没有的频道
+NAME_SUFFIXES = ["高清", "HD", "-HD", "频道", "「IPV6」", "[超清]", "(HK)"]
+FULLWIDTH = str.maketrans("0123456789", "０１２３４５６７８９")
+
+def name_pool(categories, corrections, rng):
+    names = list(dict.fromkeys(name for _, dictionary, _ in categories for name in dictionary if name))
+    names += [alias for alias in corrections if alias]
+    rng.shuffle(names)
+    try:
+        import opencc
+        to_traditional = opencc.OpenCC('s2t')
+        traditional = [to_traditional.convert(name) for name in names]
+    except ImportError:
+        traditional = names
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** 1.1 for rank in range(len(names))))
+    return names, traditional, cum_weights
+
+def random_name(pool, rng):
+    names, traditional, cum_weights = pool
+    roll = rng.random()
+    if roll < 0.15:
+        return f"自办频道{rng.randrange(5000)}"
+    pos = rng.choices(range(len(names)), cum_weights=cum_weights)[0]
+    name = traditional[pos] if roll < 0.25 else names[pos]
+    if rng.random() < 0.3:
+        name += rng.choice(NAME_SUFFIXES)
+    if rng.random() < 0.05:
+        name = name.translate(FULLWIDTH)
+    return name
+
+def random_url(urls, rng):
+    if urls and rng.random() < 0.3:
+        url = rng.choice(urls)  # 不同源之间大量重复的url
+    else:
+        url = f"http://{rng.randrange(200)}.iptv.example:{rng.choice([80, 8080, 9901])}/live/{len(urls)}.m3u8"
+        urls.append(url)
+    roll = rng.random()
+    if roll < 0.03:
+        url += "$线路" + str(rng.randrange(10))
+    elif roll < 0.05:
+        url += "#" + random_url(urls, rng)
+    return url
+
+# 生成size行的直播源（bytes），m3u每个频道两行
+def generate_playlist(size, is_m3u, pool, rng, urls):
+    lines = []
+    if is_m3u:
+        lines.append('#EXTM3U x-tvg-url="https://live.fanmingming.com/e.xml.gz"')
+        while len(lines) < size:
+            name = random_name(pool, rng)
+            lines.append(f'#EXTINF:-1 tvg-name="{name}" group-title="分组{rng.randrange(20)}",{name}')
+            lines.append(random_url(urls, rng))
+    else:
+        while len(lines) < size:
+            if rng.random() < 0.02:
+                lines.append(f"分组{rng.randrange(20)},#genre#")
+            lines.append(f"{random_name(pool, rng)},{random_url(urls, rng)}")
+    return ('\n'.join(lines[:size]) + '\n').encode('utf-8')
+
+def iter_chunks(data, chunk_size=64 * 1024):
+    for pos in range(0, len(data), chunk_size):
+        yield data[pos:pos + chunk_size]
+
+
+################# 各阶段
+def clear_caches():
+    for cached in (clean_channel_name, normalize_channel_name, _process_name_part, t2s.traditional_to_simplified):
+        cached.cache_clear()
+
+def stage_parse(playlists):
+    return [(source, list(PlaylistReader(iter_chunks(data), is_m3u))) for source, data, is_m3u in playlists]
+
+# 和main.py解析源用的是同一个函数：带#号的按#拆成多个源
+def stage_normalize(parsed):
+    return [(source, parse_channel_lines(lines)) for source, lines in parsed]
+
+def stage_classify(normalized, categories, corrections):
+    index = CategoryIndex(categories, corrections)
+    dispatcher = Dispatcher([key for key, _, _ in categories])
+    for source, channels in normalized:
+        dispatcher.other_lines.append("◆◆◆　" + source)
+        for channel_name, channel_address in channels:
+            dispatcher.dispatch(index.lookup(channel_name), channel_name, channel_address, source)
+        dispatcher.other_lines.append('\n')
+    return dispatcher
+
+# 和main.py一样按瘦身版、全集版各段落的设置纠错、去重、排序（专区段落是现成的文件，不计时），返回 (瘦身版, 全集版)
+def stage_assemble(dispatcher):
+    versions = []
+    for sections, last_separator in ((SIMPLE_SECTIONS, True), (ALL_SECTIONS, False)):
+        items = []
+        for title, content, separator in iter_sections(sections, last_separator):
+            if isinstance(content, tuple):
+                items += [f"{title},#genre#"] + category_items(dispatcher.category_lines[content[0]], *content)
+                items += ['\n'] if separator else []
+        versions.append(items)
+    return versions
+
+def stage_write(versions, others, logos, corrections, out_dir):
+    simple_items, items = versions
+    publish(render_txt(simple_items), [os.path.join(out_dir, 'live_lite.txt'), os.path.join(out_dir, 'merged_output_simple.txt')])
+    publish(render_txt(items), [os.path.join(out_dir, 'live.txt'), os.path.join(out_dir, 'merged_output.txt')])
+    publish(M3U_HEADER + ''.join(render_m3u_entries(items, logos, corrections)),
+            [os.path.join(out_dir, 'live.m3u'), os.path.join(out_dir, 'merged_output.m3u')])
+    publish(render_txt(others), [os.path.join(out_dir, 'others_output.txt')])
+
+def timed(timings, stage, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[stage] = round(time.perf_counter() - start, 4)
+    return result
+
+# 一种规模：一半m3u一半txt，每个源1万行；各阶段跑repeat遍取最快的一次
+def run_size(size, categories, corrections, logos, seed, repeat=1):
+    rng = random.Random(seed)
+    pool = name_pool(categories, corrections, rng)
+    urls = []
+    playlists = []
+    per_source = min(size, 10000)
+    for pos in range(max(1, size // per_source)):
+        is_m3u = pos % 2 == 0
+        playlists.append((f"http://source{pos}.example/live.{'m3u' if is_m3u else 'txt'}",
+                          generate_playlist(per_source, is_m3u, pool, rng, urls), is_m3u))
+
+    best = {}
+    for _ in range(repeat):
+        clear_caches()
+        timings = {}
+        parsed = timed(timings, "parse", stage_parse, playlists)
+        normalized = timed(timings, "normalize", stage_normalize, parsed)
+        dispatcher = timed(timings, "classify", stage_classify, normalized, categories, corrections)
+        versions = timed(timings, "assemble", stage_assemble, dispatcher)
+        with tempfile.TemporaryDirectory() as out_dir:
+            timed(timings, "write", stage_write, versions, dispatcher.other_lines, logos, corrections, out_dir)
+        best = {stage: min(timings[stage], best.get(stage, timings[stage])) for stage in STAGES}
+    timings = best
+    timings["total"] = round(sum(timings[stage] for stage in STAGES), 4)
+    timings["records"] = sum(len(channels) for _, channels in normalized)
+    timings["lines_per_second"] = round(size / timings["total"])
+    return timings
+
+def run_benchmark(sizes, seed, repeat=1):
+    from iptv.m3u import load_logo_index
+    categories = load_categories()
+    corrections = load_corrections()
+    logos = load_logo_index('assets/logo.txt')
+    results = {}
+    for size in sizes:
+        timings = run_size(size, categories, corrections, logos, seed, repeat)
+        print(f"{size}行: " + "  ".join(f"{stage} {timings[stage]:.3f}s" for stage in STAGES)
+              + f"  合计 {timings['total']:.3f}s")
+        results[str(size)] = timings
+    return {
+        'created': datetime.now().strftime("%Y%m%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'repeat': repeat,
+        'sizes': results,
+    }
+
+# 和基线比较，返回退化的 [(规模, 阶段, 倍数)]
+def compare_baseline(result, baseline, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    for size, timings in result['sizes'].items():
+        base = baseline.get('sizes', {}).get(size)
+        if not base:
+            continue
+        for stage in STAGES + ["total"]:
+            if not base.get(stage):
+                continue
+            ratio = timings[stage] / base[stage]
+            flag = "  ← 变慢" if ratio > threshold else ""
+            print(f"  {size}行 {stage}: {base[stage]:.3f}s → {timings[stage]:.3f}s ({ratio:.2f}x){flag}")
+            if ratio > threshold:
+                regressions.append((size, stage, round(ratio, 2)))
+    return regressions
+
+
+################# golden：用快照跑main.py，检查live.txt没变
+def inputs_digest(paths):
+    h = hashlib.sha256()
+    for path in paths:
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        for file_name in files:
+            h.update(file_name.encode('utf-8') + b'\0')
+            if os.path.exists(file_name):
+                with open(file_name, 'rb') as f:
+                    h.update(f.read())
+    return h.hexdigest()
+
+# 更新时间（第2行）和每日一首（第4行）每次都不一样，换成固定内容再算hash
+def live_digest(file_name):
+    with open(file_name, 'rb') as f:
+        lines = f.read().split(b'\n')
+    lines[1] = b'VERSION'
+    lines[3] = b'DAILY'
+    return hashlib.sha256(b'\n'.join(lines)).hexdigest(), len(lines)
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+# 临时目录里放好main.py（base_commit不为None时取那个提交的main.py）和输入，urls-daily.txt指向本地提供快照源的服务，
+# 返回 (目录, 运行main.py用的环境变量)
+@contextlib.contextmanager
+def golden_workdir(snapshot=GOLDEN_SNAPSHOT, base_commit=None):
+    repo = os.getcwd()
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_QuietHandler, directory=snapshot))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as work:
+            if base_commit is None:
+                shutil.copy(os.path.join(repo, 'main.py'), work)
+                shutil.copytree(os.path.join(repo, 'iptv'), os.path.join(work, 'iptv'),
+                                ignore=shutil.ignore_patterns('__pycache__'))
+            else:
+                with open(os.path.join(work, 'main.py'), 'wb') as f:
+                    f.write(subprocess.run(['git', 'show', f'{base_commit}:main.py'], cwd=repo, check=True,
+                                           stdout=subprocess.PIPE).stdout)
+            for path in GOLDEN_INPUTS:
+                target = os.path.join(work, path)
+                if os.path.isdir(path):
+                    shutil.copytree(path, target)
+                else:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    if os.path.exists(path):
+                        shutil.copy(path, target)
+                    else:
+                        open(target, 'w').close() # 如blacklist_auto.txt由检测流程生成，仓库里可能没有
+            with open(os.path.join(work, 'assets/urls-daily.txt'), 'w', encoding='utf-8') as f:
+                for file_name in sorted(os.listdir(snapshot)):
+                    if '%' not in file_name:
+                        f.write(f"http://127.0.0.1:{server.server_port}/{urllib.parse.quote(file_name)}\n")
+            yield work, dict(os.environ, IPTV_CACHE_DIR=os.path.join(work, '.cache'))
+    finally:
+        server.shutdown()
+
+def run_main(work, env):
+    subprocess.run([sys.executable, 'main.py'], cwd=work, env=env, check=True, stdout=subprocess.DEVNULL)
+
+# 在临时目录里用快照源跑两遍main.py（第一遍全量，第二遍走缓存/增量构建），返回两遍live.txt的 (hash, 行数)
+def run_golden(snapshot=GOLDEN_SNAPSHOT):
+    with golden_workdir(snapshot) as (work, env):
+        digests = []
+        for _ in range(2):
+            run_main(work, env)
+            digests.append(live_digest(os.path.join(work, 'live.txt')))
+        return digests
+
+def check_golden(record=False):
+    golden = {'snapshot': GOLDEN_SNAPSHOT, 'inputs': inputs_digest(GOLDEN_INPUTS)}
+    (digest, lines), (warm_digest, _) = run_golden()
+    if digest != warm_digest:
+        print("golden: 第二遍（缓存/增量构建）的live.txt和第一遍不一致")
+        return False
+    if record:
+        golden.update(sha256=digest, lines=lines)
+        with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+            json.dump(golden, f, ensure_ascii=False, indent=2)
+        print(f"golden已记录: {lines}行 {digest}")
+        return True
+    try:
+        with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        print(f"没有golden记录，先在已经通过检查的代码上（改动之前）运行 --record-golden")
+        return False
+    if stored.get('inputs') != golden['inputs'] or stored.get('snapshot') != golden['snapshot']:
+        print("golden: 字典/专区/黑名单等输入和记录时不同，先在已经通过检查的代码上（改动之前）重新运行 --record-golden")
+        return False
+    if stored['sha256'] != digest:
+        print(f"golden: live.txt有变化（{stored['lines']}行 → {lines}行）")
+        return False
+    print(f"golden: live.txt一致（{lines}行）")
+    return True
+
+
+################# diff-base：最初的main.py和当前代码的live.txt逐段比较
+# 快照源跑一遍main.py，返回 (live.txt的各行, others_output.txt的各行)
+def run_outputs(base_commit=None, snapshot=GOLDEN_SNAPSHOT):
+    with golden_workdir(snapshot, base_commit) as (work, env):
+        run_main(work, env)
+        outputs = []
+        for file_name in ('live.txt', 'others_output.txt'):
+            with open(os.path.join(work, file_name), 'r', encoding='utf-8') as f:
+                outputs.append(f.read().split('\n'))
+        return outputs
+
+# live.txt按 ",#genre#" 拆成 [(标题, [行])]，去掉空行，更新时间和每日一首换成固定内容
+def split_sections(lines):
+    lines = list(lines)
+    lines[1] = 'VERSION'
+    lines[3] = 'DAILY'
+    sections = []
+    for line in lines:
+        if line.endswith(',#genre#'):
+            sections.append((line[:-len(',#genre#')], []))
+        elif line.strip() and sections:
+            sections[-1][1].append(line)
+    return sections
+
+def _halfwidth_name(line):
+    name, sep, url = line.partition(',')
+    return name.translate(FULLWIDTH_TABLE) + sep + url
+
+_FULLWIDTH_SIGNS = str.maketrans("+-", "＋－")
+
+# 同一个URL在两边名称不同时，是不是全角＋－造成的：原来CCTV名称整理时丢掉了全角的＋－（CCTV5＋→CCTV5）
+def _is_fullwidth_rename(base_line, head_line):
+    base_name, _, base_url = base_line.partition(',')
+    head_name, _, head_url = head_line.partition(',')
+    return base_url == head_url and _process_name_part(head_name.translate(_FULLWIDTH_SIGNS)) == base_name
+
+# 把base里因为全角＋－整理得不一样的行换成当前代码的写法，返回 (换过的行, 换过名称的频道名)
+def apply_renames(base_lines, head_lines):
+    missing = collections.Counter(base_lines) - collections.Counter(head_lines)
+    extra = collections.Counter(head_lines) - collections.Counter(base_lines)
+    renames = {}
+    for base_line in missing:
+        for head_line in extra:
+            if _is_fullwidth_rename(base_line, head_line):
+                renames[base_line] = head_line
+                break
+    return [renames.get(line, line) for line in base_lines], {line.split(',', 1)[0] for line in renames.values()}
+
+# 按当前代码的段落设置把一段重新排好：字典排序的段落按字典位置稳定排序，原来set()去重的同一位置内再按整行排，整行排序的重新排；
+# loose_names里的频道名（换过名称的行原来排在别的位置）同一位置内也按整行排
+def normalize_section(lines, content, loose_names=()):
+    if not isinstance(content, tuple):
+        return lines
+    key, sort, dedupe, _ = content
+    if sort != "dictionary":
+        return sorted(dict.fromkeys(lines) if dedupe else lines)
+    order = {name: pos for pos, name in enumerate(load_category_dictionaries()[key])}
+    rank = lambda line: order.get(line.split(',', 1)[0], len(order))
+    if dedupe:
+        return sorted(dict.fromkeys(lines), key=lambda line: (rank(line), line))
+    return sorted(lines, key=lambda line: (rank(line), line if line.split(',', 1)[0] in loose_names else ''))
+
+# 比较两份live.txt，返回不一致的说明（空列表为一致）
+def diff_base_outputs(base_live, base_others, head_live):
+    corrections = load_corrections()
+    # 原来落到others的 (纠错后的名称, URL)，当前代码按别名归类后多出来的行只能是这些
+    alias_lines = set()
+    for line in base_others:
+        name, sep, url = _halfwidth_name(line).partition(',')
+        if sep and corrections.get(name, name) != name:
+            alias_lines.add(f"{corrections[name]},{url}")
+    contents = dict(ALL_SECTIONS)
+    base_sections = split_sections(base_live)
+    head_sections = split_sections(head_live)
+    if [title for title, _ in base_sections] != [title for title, _ in head_sections]:
+        return ["段落标题或顺序不同"]
+    problems = []
+    for (title, base_lines), (_, head_lines) in zip(base_sections, head_sections):
+        content = contents.get(title)
+        base_lines, renamed = apply_renames([_halfwidth_name(line) for line in base_lines], head_lines)
+        base_lines = normalize_section(base_lines, content, renamed)
+        head_lines = normalize_section(head_lines, content, renamed)
+        extra = collections.Counter(head_lines) - collections.Counter(base_lines)
+        unexpected = [line for line in extra if line not in alias_lines]
+        if unexpected:
+            problems.append(f"{title}: 多出 {len(unexpected)} 行，如 {unexpected[0]}")
+            continue
+        head_lines = [line for line in head_lines if line not in extra]
+        if head_lines != base_lines:
+            missing = list(collections.Counter(base_lines) - collections.Counter(head_lines))
+            problems.append(f"{title}: " + (f"少了 {len(missing)} 行，如 {missing[0]}" if missing else "顺序不同"))
+    return problems
+
+def check_diff_base(base_commit=BASE_COMMIT):
+    base_live, base_others = run_outputs(base_commit)
+    head_live, _ = run_outputs()
+    problems = diff_base_outputs(base_live, base_others, head_live)
+    for problem in problems:
+        print(f"diff-base: {problem}")
+    if problems:
+        return False
+    print(f"diff-base: live.txt和{base_commit}一致（除已知差别：{'；'.join(KNOWN_DIFFERENCES)}）")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="直播源聚合性能基准")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)), help="生成的直播源行数，逗号分隔")
+    parser.add_argument('--seed', type=int, default=20241109)
+    parser.add_argument('--repeat', type=int, default=3, help="每个阶段跑几遍，取最快的一次")
+    parser.add_argument('--output', default=RESULT_FILE, help="本次结果JSON")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果存为基线")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--golden', action='store_true', help="检查live.txt和golden记录一致")
+    parser.add_argument('--record-golden', action='store_true', help="用当前代码记录golden")
+    parser.add_argument('--diff-base', nargs='?', const=BASE_COMMIT, metavar='COMMIT',
+                        help=f"和最初的main.py（默认{BASE_COMMIT}）比较live.txt，只允许已知差别")
+    args = parser.parse_args()
+
+    ok = True
+    if args.golden or args.record_golden:
+        ok = check_golden(record=args.record_golden)
+    if args.diff_base:
+        ok = check_diff_base(args.diff_base) and ok
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    if sizes:
+        result = run_benchmark(sizes, args.seed, args.repeat)
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.output}")
+        if args.save_baseline:
+            with open(args.baseline, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            print(f"基线已保存到: {args.baseline}")
+        else:
+            try:
+                with open(args.baseline, 'r', encoding='utf-8') as f:
+                    baseline = json.load(f)
+                print(f"和基线比较（{baseline.get('created')}，Python {baseline.get('python')}）:")
+                if compare_baseline(result, baseline, args.threshold):
+                    ok = False
+            except (OSError, ValueError):
+                print("没有基线，用 --save-baseline 保存一份")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,16 @@
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
+import asyncio
 from datetime import datetime
 import os
 from urllib.parse import urlparse
 import socket  #check p3p源 rtp源
-import subprocess #check rtmp源
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仓库根目录，引用iptv公共模块
+from iptv.fetch import open_url #带条件请求缓存的下载
+from iptv.playlist import PlaylistReader #流式解析直播源
+from iptv.ffprobe import submit_ffprobe, ffprobe_calls #rtmp源用ffprobe检测，子进程数单独限制
+from iptv.probe import ProbeEngine, check_http, to_thread_timed, Timed, cached_address, canonical_url, CONCURRENCY, MAX_PER_HOST #并发检测直播源
+from iptv.probe_store import ProbeStore #检测结果库
 
 timestart = datetime.now()
 
@@ -23,52 +28,31 @@ def read_txt_file(file_path):
         ]
     return lines
 
-# 检测URL是否可访问并记录响应时间
-def check_url(url, timeout=6):
-    start_time = time.time()
-    elapsed_time = None
-    success = False
-    
-    try:
-        if url.startswith("http"):
-            headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            }
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                if response.status == 200:
-                    success = True
-        elif url.startswith("p3p"):
-            success = check_p3p_url(url, timeout)
-        elif url.startswith("p2p"):
-            success = check_p2p_url(url, timeout)        
-        elif url.startswith("rtmp") or url.startswith("rtsp") :
-            success = check_rtmp_url(url, timeout)
-        elif url.startswith("rtp"):
-            success = check_rtp_url(url, timeout)
-
-        # 如果执行到这一步，没有异常，计算时间
-        elapsed_time = (time.time() - start_time) * 1000  # 转换为毫秒
-
-    except Exception as e:
-        print(f"Error checking {url}: {e}")
-        record_host(get_host_from_url(url))
-        # 在发生异常的情况下，将 elapsed_time 设置为 None
-        elapsed_time = None
-
-    return elapsed_time, success
-
-def check_rtmp_url(url, timeout):
-    try:
-        result = subprocess.run(['ffprobe', url], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
-        if result.returncode == 0:
-            return True
-    except subprocess.TimeoutExpired:
-        print(f"Timeout checking {url}")
-    except Exception as e:
-        print(f"Error checking {url}: {e}")
+# 检测URL是否可访问：http(s)直接在事件循环里检测（只读开头几KB，确认是视频流），rtmp/rtsp交给ffprobe线程池，
+# 其他协议的检测是阻塞的，放到线程里执行（在线程里计时，返回Timed）。
+# 返回是否可用，出错时抛异常（记入blackhost统计）；响应时间由ProbeEngine记录
+async def check_url(url, timeout=6):
+    if url.startswith("http"):
+        return await check_http(url, timeout)
+    elif url.startswith("p3p"):
+        return await to_thread_timed(check_p3p_url, url, timeout)
+    elif url.startswith("p2p"):
+        return await to_thread_timed(check_p2p_url, url, timeout)
+    elif url.startswith("rtmp") or url.startswith("rtsp") :
+        return await check_rtmp_url(url, timeout)
+    elif url.startswith("rtp"):
+        return await to_thread_timed(check_rtp_url, url, timeout)
     return False
 
+# ffprobe在iptv.ffprobe的专用线程池里运行，这里只等结果
+async def check_rtmp_url(url, timeout):
+    info = await asyncio.wrap_future(submit_ffprobe(url, timeout))
+    if info.error is not None:
+        print(f"Error checking {url}: {info.error}")
+    if info.elapsed is None:
+        return info.ok
+    return Timed(info.ok, info.elapsed)  # 响应时间只算ffprobe子进程运行的时间
+
 def check_rtp_url(url, timeout):
     try:
         # 解析URL
@@ -78,11 +62,13 @@ def check_rtp_url(url, timeout):
         host = parsed_url.hostname
         port = parsed_url.port
 
+        address = cached_address(host)  # 检测前已经解析好的ip
+
         # 创建一个 socket 连接
         with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
             s.settimeout(timeout)  # 设置超时时间
-            s.connect((host, port))
-            s.sendto(b'', (host, port))  # 发送空的UDP数据包
+            s.connect((address, port))
+            s.sendto(b'', (address, port))  # 发送空的UDP数据包
             s.recv(1)  # 尝试接收数据
         return True
     except (socket.timeout, socket.error):
@@ -101,7 +87,7 @@ def check_p3p_url(url, timeout):
             raise ValueError("Invalid p3p URL")
 
         # 创建一个 TCP 连接
-        with socket.create_connection((host, port), timeout=timeout) as s:
+        with socket.create_connection((cached_address(host), port), timeout=timeout) as s:
             # 发送一个简单的请求（根据协议定义可能需要调整）
             request = f"GET {path} P3P/1.0\r\nHost: {host}\r\n\r\n"
             s.sendall(request.encode())
@@ -129,7 +115,7 @@ def check_p2p_url(url, timeout):
             raise ValueError("Invalid P2P URL")
 
         # 创建一个 TCP 连接
-        with socket.create_connection((host, port), timeout=timeout) as s:
+        with socket.create_connection((cached_address(host), port), timeout=timeout) as s:
             # 自定义请求，这里只是一个占位符，需根据具体协议定义
             request = f"YOUR_CUSTOM_REQUEST {path}\r\nHost: {host}\r\n\r\n"
             s.sendall(request.encode())
@@ -144,34 +130,52 @@ def check_p2p_url(url, timeout):
         print(f"Error checking {url}: {e}")
     return False
 
-# 处理单行文本并检测URL
-def process_line(line):
-    if "#genre#" in line or "://" not in line :
-        return None, None  # 跳过包含“#genre#”的行
-    parts = line.split(',')
-    if len(parts) == 2:
-        name, url = parts
-        elapsed_time, is_valid = check_url(url.strip())
-        if is_valid:
-            return elapsed_time, line.strip()
-        else:
-            return None, line.strip()
-    return None, None
-
-# 多线程处理文本并检测URL
-def process_urls_multithreaded(lines, max_workers=30):
+# 检测URL并生成successlist（带响应时间）和blacklist。检测结果存在检测结果库里，
+# 只检测新出现的和到期的URL，其余的直接用库里上次的结果（稳定的URL检测间隔会逐渐拉长）。
+# concurrency为同时检测的个数（受文件描述符上限约束），per_host为同一个host同时检测的个数
+def process_urls_async(lines, concurrency=CONCURRENCY, per_host=MAX_PER_HOST):
     blacklist =  [] 
     successlist = []
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(process_line, line): line for line in lines}
-        for future in as_completed(futures):
-            elapsed_time, result = future.result()
-            if result:
-                if elapsed_time is not None:
-                    successlist.append(f"{elapsed_time:.2f}ms,{result}")
-                else:
-                    blacklist.append(result)
+    url_lines = {}   # {检测的url: [行, ...]}
+    first_urls = {}  # {规范化的url: 这种写法第一次出现时的原样url}
+    for line in lines:
+        if "#genre#" in line or "://" not in line :
+            continue  # 跳过包含“#genre#”的行
+        parts = line.split(',')
+        if len(parts) == 2:
+            # 同一个源的不同写法（大小写、默认端口、统计参数等）只检测一次，结果对每种写法都生效；
+            # 规范化的url只用来去重，检测和记录的是第一次出现的原样url（签名、中转地址可能离不开原来的参数）
+            url = first_urls.setdefault(canonical_url(parts[1]), parts[1].strip())
+            url_lines.setdefault(url, []).append(line.strip())
+
+    store = ProbeStore()
+    store.seen(url_lines)
+    due_urls = store.due(url_lines)
+
+    def on_result(result):
+        if result.error is not None:
+            print(f"Error checking {result.url}: {result.error}")
+            record_host(get_host_from_url(result.url))
+        store.record(result.url, result.ok, result.elapsed, probed=result.probed)
+
+    engine = ProbeEngine(check_url, concurrency=concurrency, per_host=per_host)
+    timeouts = store.timeouts(due_urls, maximum=engine.timeout) # 按以往的响应时间给每个URL定超时
+    print(f"检测{len(due_urls)}个URL（共{len(url_lines)}个，其余未到期），并发{engine.concurrency}，每个host并发{engine.per_host}")
+    print(f"超时: 平均{sum(timeouts.values()) / max(1, len(timeouts)):.2f}秒，最长{engine.timeout}秒")
+    engine.run(due_urls, on_result, timeouts)
+    print(f"域名{engine.hosts}个，不存在的{engine.unresolvable}个（这些URL未检测）")
+    print(f"ffprobe调用{ffprobe_calls()}次")
+    for host, skipped in engine.breaker.skipped.items():
+        print(f"熔断host: {host}，{skipped}个URL未逐个检测")
+
+    for url, (ok, latency, _) in store.entries(url_lines).items():
+        for line in url_lines[url]:
+            if ok:
+                successlist.append(f"{latency:.2f}ms,{line}")
+            else:
+                blacklist.append(line)
+    store.close()
     return successlist, blacklist
 
 # 写入文件
@@ -193,54 +197,26 @@ def get_url_file_extension(url):
     extension = os.path.splitext(path)[1]
     return extension
 
-def convert_m3u_to_txt(m3u_content):
-    # 分行处理
-    lines = m3u_content.split('\n')
-    
-    # 用于存储结果的列表
-    txt_lines = []
-    
-    # 临时变量用于存储频道名称
-    channel_name = ""
-    
-    for line in lines:
-        # 过滤掉 #EXTM3U 开头的行
-        if line.startswith("#EXTM3U"):
-            continue
-        # 处理 #EXTINF 开头的行
-        if line.startswith("#EXTINF"):
-            # 获取频道名称（假设频道名称在引号后）
-            channel_name = line.split(',')[-1].strip()
-        # 处理 URL 行
-        elif line.startswith("http"):
-            txt_lines.append(f"{channel_name},{line.strip()}")
-    
-    # 将结果合并成一个字符串，以换行符分隔
-    # return '\n'.join(txt_lines)
-    return txt_lines
-
 url_statistics=[]
 
 def process_url(url):
     try:
-        # 打开URL并读取内容
-        with urllib.request.urlopen(url) as response:
-            # 以二进制方式读取数据
-            data = response.read()
-            # 将二进制数据解码为字符串
-            text = data.decode('utf-8')
-            if get_url_file_extension(url)==".m3u" or get_url_file_extension(url)==".m3u8":
-                m3u_lines=convert_m3u_to_txt(text)
-                url_statistics.append(f"{len(m3u_lines)},{url.strip()}")
-                urls_all_lines.extend(m3u_lines) # 注意：extend
-            elif get_url_file_extension(url)==".txt":
-                lines = text.split('\n')
-                url_statistics.append(f"{len(lines)},{url.strip()}")
-                for line in lines:
+        # 边下载边逐行读取内容，m3u和m3u8按#EXTINF提取频道名
+        extension = get_url_file_extension(url)
+        if extension==".m3u" or extension==".m3u8":
+            with open_url(url) as body:
+                m3u_lines = list(PlaylistReader(body.iter_chunks(), is_m3u=True))
+            url_statistics.append(f"{len(m3u_lines)},{url.strip()}")
+            urls_all_lines.extend(m3u_lines) # 注意：extend
+        elif extension==".txt":
+            with open_url(url) as body:
+                reader = PlaylistReader(body.iter_chunks())
+                for line in reader:
                     if  "#genre#" not in line and "," in line and "://" in line:
                         #channel_name=line.split(',')[0].strip()
                         #channel_address=line.split(',')[1].strip()
                         urls_all_lines.append(line.strip())
+            url_statistics.append(f"{reader.line_count},{url.strip()}")
     
     except Exception as e:
         print(f"处理URL时发生错误：{e}")
@@ -248,14 +224,14 @@ def process_url(url):
 
 # 去重复源 2024-08-06 (检测前剔除重复url，提高检测效率)
 def remove_duplicates_url(lines):
-    urls =[]
+    urls =set() # 用set查找，list逐个比较在几十万行时很慢
     newlines=[]
     for line in lines:
         if "," in line and "://" in line:
             # channel_name=line.split(',')[0].strip()
             channel_url=line.split(',')[1].strip()
             if channel_url not in urls: # 如果发现当前url不在清单中，则假如newlines
-                urls.append(channel_url)
+                urls.add(channel_url)
                 newlines.append(line)
     return newlines
 
@@ -280,6 +256,8 @@ def clean_url(lines):
 def split_url(lines):
     newlines=[]
     for line in lines:
+        if "," not in line:
+            continue
         # 拆分成频道名和URL部分
         channel_name, channel_address = line.split(',', 1)
         #需要加处理带#号源=予加速源
@@ -291,7 +269,7 @@ def split_url(lines):
             for url in url_list:
                 if "://" in url: 
                     newline=f'{channel_name},{url}'
-                    newlines.append(line)
+                    newlines.append(newline)
     return newlines
 
 # 取得host
@@ -386,7 +364,7 @@ if __name__ == "__main__":
     urls_hj = len(lines)
 
     # 处理URL并生成成功清单和黑名单
-    successlist, blacklist = process_urls_multithreaded(lines)
+    successlist, blacklist = process_urls_async(lines)
     
     # 给successlist, blacklist排序
     # 定义排序函数
@@ -1,43 +1,32 @@
+import asyncio
 import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
 from datetime import datetime
 import os
 from urllib.parse import urlparse
 import socket  #check p3p源 rtp源
-import subprocess #check rtmp源
-import json
 import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仓库根目录，引用iptv公共模块
+from iptv.ffprobe import submit_ffprobe, ffprobe_calls #ffprobe线程池，同一个url只调用一次
+from iptv.hls import probe_hls #直接读m3u8里的分辨率
+from iptv.media import probe_video #解析TS/FLV流头取分辨率
+from iptv.probe import ProbeEngine, check_http, to_thread_timed, Timed, CONCURRENCY, MAX_PER_HOST #并发检测直播源
 
 timestart = datetime.now()
 
 
-def get_video_resolution(video_path, timeout=8):
-    # 使用 ffprobe 命令来获取视频的流信息，以 JSON 格式输出
-    command = [
-        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries',
-        'stream=width,height', '-of', 'json', video_path
-    ]
-    
-    try:
-        # 运行命令并捕获输出，设置超时时间
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
-        
-        # 解析 JSON 输出
-        video_info = json.loads(result.stdout)
-        
-        # 提取宽度和高度
-        width = video_info['streams'][0]['width']
-        height = video_info['streams'][0]['height']
-        
-        return width, height
-    
-    except subprocess.TimeoutExpired:
-        # print(f"ffprobe 超时（超过 {timeout} 秒）")
-        return None, None
-    except Exception as e:
-        # print(f"发生错误: {e}")
-        return None, None
+# 检测到的分辨率 {url: (width, height)}
+resolutions = {}
+
+# 获取可用源的分辨率：m3u8清单里写了的、解析视频头取到的直接用，其余的在ffprobe线程池里并发获取，
+# ffprobe的结果按url缓存，rtmp/rtsp源检测可用性时已经调用过的不会再起一次子进程
+def get_video_resolutions(urls, timeout=8):
+    futures = {url: submit_ffprobe(url, timeout) for url in urls if url not in resolutions}
+    for url, future in futures.items():
+        info = future.result()
+        resolutions[url] = (info.width, info.height)
+    return {url: resolutions[url] for url in urls}
 
 # 读取文件内容
 def read_txt_file(file_path):
@@ -61,58 +50,45 @@ def get_random_user_agent():
     ]
     return random.choice(USER_AGENTS)
 
-# 检测URL是否可访问并记录响应时间
-def check_url(url, timeout=6):
-    start_time = time.time()
-    elapsed_time = None
-    success = False
-    width = 0 
-    height = 0 
-    
-    try:
-        if url.startswith("http"):
-            headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            }
-
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                if response.status == 200:
-                    success = True
-        elif url.startswith("p3p"):
-            success = check_p3p_url(url, timeout)
-        elif url.startswith("p2p"):
-            success = check_p2p_url(url, timeout)        
-        elif url.startswith("rtmp") or url.startswith("rtsp") :
-            success = check_rtmp_url(url, timeout)
-        elif url.startswith("rtp"):
-            success = check_rtp_url(url, timeout)
-
-        # 如果执行到这一步，没有异常，计算时间
-        elapsed_time = (time.time() - start_time) * 1000  # 转换为毫秒
-        
-        if success:
-            width, height=get_video_resolution(url)
-          # print(f"{elapsed_time},{resolution},{url}")
-
-    except Exception as e:
-        print(f"Error checking {url}: {e}")
-        # 在发生异常的情况下，将 elapsed_time 设置为 None
-        elapsed_time = None
-
-    return success,elapsed_time, width, height
-
-def check_rtmp_url(url, timeout):
-    try:
-        result = subprocess.run(['ffprobe', url], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
-        if result.returncode == 0:
-            return True
-    except subprocess.TimeoutExpired:
-        print(f"Timeout checking {url}")
-    except Exception as e:
-        print(f"Error checking {url}: {e}")
+# 检测URL是否可访问：http(s)直接在事件循环里检测（只读开头几KB，确认是视频流），m3u8读清单和最新的分片，
+# 顺便记下清单里写的分辨率；rtmp/rtsp交给ffprobe线程池，其他协议的检测是阻塞的，放到线程里执行（在线程里计时）。
+# 返回是否可用，出错时抛异常；响应时间由ProbeEngine记录
+async def check_url(url, timeout=6):
+    if url.startswith("http"):
+        kind = 'm3u8' if get_url_file_extension(url) == ".m3u8" else await check_http(url, timeout)
+        if kind != 'm3u8':
+            return kind is not None
+        info = await probe_hls(url, timeout)
+        if info.ok and info.width:
+            resolutions[url] = (info.width, info.height)
+        return info.ok
+    elif url.startswith("p3p"):
+        return await to_thread_timed(check_p3p_url, url, timeout)
+    elif url.startswith("p2p"):
+        return await to_thread_timed(check_p2p_url, url, timeout)
+    elif url.startswith("rtmp") or url.startswith("rtsp") :
+        return await check_rtmp_url(url, timeout)
+    elif url.startswith("rtp"):
+        return await to_thread_timed(check_rtp_url, url, timeout)
     return False
 
+# 读视频头取分辨率（m3u8读最新的分片），不起子进程，取到了返回True
+async def check_resolution(url, timeout=6):
+    info = await probe_video(url, timeout)
+    if info is None or not info.width:
+        return False
+    resolutions[url] = (info.width, info.height)
+    return True
+
+# ffprobe在iptv.ffprobe的专用线程池里运行，和get_video_resolutions共用一次调用
+async def check_rtmp_url(url, timeout):
+    info = await asyncio.wrap_future(submit_ffprobe(url, timeout))
+    if info.error is not None:
+        print(f"Error checking {url}: {info.error}")
+    if info.elapsed is None:
+        return info.ok
+    return Timed(info.ok, info.elapsed)  # 响应时间只算ffprobe子进程运行的时间
+
 def check_rtp_url(url, timeout):
     try:
         # 解析URL
@@ -188,35 +164,36 @@ def check_p2p_url(url, timeout):
         print(f"Error checking {url}: {e}")
     return False
 
-# 处理单行文本并检测URL
-def process_line(line):
-    if "#genre#" in line or "://" not in line :
-        return None, None  # 跳过包含“#genre#”的行
-    parts = line.split(',')
-    if len(parts) == 2:
-        name, url = parts
-        is_valid,elapsed_time, width, height = check_url(url.strip())
-        if is_valid:
-            return is_valid,elapsed_time, width, height
-        else:
-            return is_valid,elapsed_time, width, height
-    return None, None, None, None
-
-# 多线程处理文本并检测URL
-def process_urls_multithreaded(lines, max_workers=10):
-    blacklist =  [] 
-    successlist = []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(process_line, line): line for line in lines}
-        for future in as_completed(futures):
-            elapsed_time,resolution,result = future.result()
-            if result:
-                if elapsed_time is not None:
-                    successlist.append(f"{elapsed_time:.2f}ms,{resolution},{result}")
-                else:
-                    blacklist.append(result)
-    return successlist, blacklist
+# 并发检测所有URL，再取可用源的分辨率，返回 {url: (是否可用, 响应时间, 宽, 高)}；
+# 检测出错的响应时间为None，不可用的分辨率为0 x 0，取不到分辨率的为None x None
+def process_urls_async(lines, concurrency=CONCURRENCY, per_host=MAX_PER_HOST):
+    urls = []
+    for line in lines:
+        if "#genre#" in line or "://" not in line :
+            continue  # 跳过包含“#genre#”的行
+        parts = line.split(',')
+        if len(parts) == 2:
+            urls.append(parts[1].strip())
+    urls = list(dict.fromkeys(urls))
+
+    def on_result(result):
+        if result.error is not None:
+            print(f"Error checking {result.url}: {result.error}")
+
+    engine = ProbeEngine(check_url, concurrency=concurrency, per_host=per_host)
+    print(f"检测{len(urls)}个URL，并发{engine.concurrency}，每个host并发{engine.per_host}")
+    results = engine.run(urls, on_result)
+    ok_urls = [result.url for result in results if result.ok]
+
+    # 分辨率：m3u8清单里写了的直接用，其余http源读TS/FLV流开头解析，都取不到的再用ffprobe
+    hls_resolutions = len(resolutions)
+    ProbeEngine(check_resolution, concurrency=concurrency, per_host=per_host).run(
+        [url for url in ok_urls if url.startswith("http") and url not in resolutions])
+    parsed_resolutions = len(resolutions) - hls_resolutions
+    ok_resolutions = get_video_resolutions(ok_urls)
+    print(f"分辨率: m3u8清单{hls_resolutions}个，解析视频头{parsed_resolutions}个，ffprobe调用{ffprobe_calls()}次")
+
+    return {result.url: (result.ok, result.elapsed, *ok_resolutions.get(result.url, (0, 0))) for result in results}
 
 # 写入文件
 def write_list(file_path, data_list):
@@ -385,8 +362,8 @@ if __name__ == "__main__":
     lines=remove_duplicates_url(lines)
     urls_hj = len(lines)
 
-    # 处理URL并生成成功清单和黑名单
-    # successlist, blacklist = process_urls_multithreaded(lines)
+    # 检测URL，取分辨率
+    results = process_urls_async(lines)
 
     formatted_time = datetime.now().strftime("%Y%m%d %H:%M:%S")
 
@@ -395,7 +372,7 @@ if __name__ == "__main__":
 
     for line in lines:
         if  "#genre#" not in line and "," in line and "://" in line:
-            is_valid,elapsed_time, width, height=process_line(line)
+            is_valid,elapsed_time, width, height=results.get(line.split(',')[1].strip(), (None, None, None, None))
 
             #处理time为none
             try:
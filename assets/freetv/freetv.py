@@ -1,9 +1,14 @@
-import urllib.request
 from urllib.parse import urlparse
 import re
 import os
+import sys
 from datetime import datetime, timedelta, timezone
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仓库根目录，引用iptv公共模块
+from iptv.fetch import open_url #带条件请求缓存的下载
+from iptv.playlist import PlaylistReader #流式解析直播源
+from iptv.util import read_txt_to_array, clean_url #读取文本、URL中$之后的内容去掉（不依赖opencc）
+
 # 定义
 freetv_lines = []
 
@@ -31,54 +36,31 @@ def rename_channel(corrections, data):
         corrected_data.append(f"{name},{url}")
     return corrected_data
 
-#读取文本方法
-def read_txt_to_array(file_name):
-    try:
-        with open(file_name, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-            lines = [line.strip() for line in lines]
-            return lines
-    except FileNotFoundError:
-        print(f"File '{file_name}' not found.")
-        return []
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return []
-    
 # 组织过滤后的freetv
-def process_channel_line(line):
+def process_channel_line(line, lines):
     if  "#genre#" not in line and "," in line and "://" in line:
         channel_name, channel_address = line.split(',', 1)
         channel_address=channel_address+"$"+channel_name.strip().replace(' ', '_')
         line=channel_name+","+channel_address
-        freetv_lines.append(line.strip())
+        lines.append(line.strip())
 
 
 def process_url(url):
     try:
-        # 创建一个请求对象并添加自定义header
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3')
-
-        # 打开URL并读取内容
-        with urllib.request.urlopen(req) as response:
-            # 以二进制方式读取数据
-            data = response.read()
-            # 将二进制数据解码为字符串
-            text = data.decode('utf-8')
-            # channel_name=""
-            # channel_address=""
-
-            # 逐行处理内容
-            lines = text.split('\n')
-            print(f"行数: {len(lines)}")
-            for line in lines:
+        # 边下载边逐行处理内容（未变化时服务端返回304，直接读本地缓存）
+        # 先放到本源自己的列表里，整个源读完才加入结果，中途出错时不留下半个源
+        source_lines = []
+        with open_url(url) as body:
+            reader = PlaylistReader(body.iter_chunks())
+            for line in reader:
                 if  "#genre#" not in line and "," in line and "://" in line:
                     # 拆分成频道名和URL部分
                     channel_name, channel_address = line.split(',', 1)
                     
                     if channel_name in freetv_dictionary:
-                        process_channel_line(line) 
+                        process_channel_line(line, source_lines) 
+        freetv_lines.extend(source_lines)
+        print(f"行数: {reader.line_count}")
 
     except Exception as e:
         print(f"处理URL时发生错误：{e}")
@@ -128,13 +110,6 @@ except Exception as e:
     print(f"保存文件时发生错误：{e}")
 
 # # # # # # # # # # # # # # # # # # # # # # # 分批再次保存
-# $去掉
-def clean_url(url):
-    last_dollar_index = url.rfind('$')  # 安全起见找最后一个$处理
-    if last_dollar_index != -1:
-        return url[:last_dollar_index]
-    return url
-
 for line in freetv_lines_renamed:
     if  "#genre#" not in line and "," in line and "://" in line:
         channel_name=line.split(',')[0].strip()
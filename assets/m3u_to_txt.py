@@ -1,12 +1,9 @@
 import urllib.request
-import opencc #简繁转换
+import os
+import sys
 
-#简繁转换
-def traditional_to_simplified(text: str) -> str:
-    # 初始化转换器，"t2s" 表示从繁体转为简体
-    converter = opencc.OpenCC('t2s')
-    simplified_text = converter.convert(text)
-    return simplified_text
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录，引用iptv公共模块
+from iptv.t2s import traditional_to_simplified #繁转简（共用转换器+缓存）
 
 def convert_m3u_to_txt(m3u_content):
     # 分行处理
@@ -1,7 +1,10 @@
 import os
-import requests
+import sys
 from datetime import datetime, timedelta, timezone
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仓库根目录，引用iptv公共模块
+from iptv.fetch import fetch_url #带条件请求缓存的下载
+
 
 #读取文本方法
 def read_txt_to_array(file_name):
@@ -45,21 +48,18 @@ for url in urls:
             url=url.replace("{MMdd-1}", yesterday_date_str)
 
         try:
-            # 获取文件内容
-            response = requests.get(url)
-            if response.status_code == 200:
-                # 生成带时间戳的文件名
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                file_name = url.split('/')[-1]
-                file_path = os.path.join(folder_name, f"{timestamp}_{file_name}")
-                
-                # 将内容写入文件
-                with open(file_path, 'wb') as file:
-                    file.write(response.content)
-                
-                print(f"文件已保存：{file_path}")
-            else:
-                print(f"无法下载文件：{url}")
+            # 获取文件内容（未变化时服务端返回304，直接用本地缓存）
+            content = fetch_url(url)
+            # 生成带时间戳的文件名
+            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+            file_name = url.split('/')[-1]
+            file_path = os.path.join(folder_name, f"{timestamp}_{file_name}")
+            
+            # 将内容写入文件
+            with open(file_path, 'wb') as file:
+                file.write(content)
+            
+            print(f"文件已保存：{file_path}")
         
         except Exception as e:
             print(f"处理URL时发生错误：{e}")
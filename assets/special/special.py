@@ -1,21 +1,12 @@
-import urllib.request
 from urllib.parse import urlparse
 from datetime import datetime, timedelta, timezone
+import os
+import sys
 
-
-#读取文本方法
-def read_txt_to_array(file_name):
-    try:
-        with open(file_name, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-            lines = [line.strip() for line in lines]
-            return lines
-    except FileNotFoundError:
-        print(f"File '{file_name}' not found.")
-        return []
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return []
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仓库根目录，引用iptv公共模块
+from iptv.fetch import open_url #带条件请求缓存的下载
+from iptv.playlist import PlaylistReader #流式解析直播源
+from iptv.util import read_txt_to_array #读取文本（不依赖opencc）
 
 all_lines =  []
 #读取文本
@@ -24,25 +15,19 @@ excudelist_lines=read_txt_to_array('assets/special/ExcludeList.txt')
 def process_url(url):
     try:
 
-        # 创建一个请求对象并添加自定义header
-        req = urllib.request.Request(url)
-        req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3')
-
-        # 打开URL并读取内容
-        with urllib.request.urlopen(req) as response:
-            # 以二进制方式读取数据
-            data = response.read()
-            # 将二进制数据解码为字符串
-            text = data.decode('utf-8')
-            # 逐行处理内容
-            lines = text.split('\n')
-            print(f"行数: {len(lines)}")
-            for line in lines:
+        # 边下载边逐行处理内容（未变化时服务端返回304，直接读本地缓存）
+        # 先放到本源自己的列表里，整个源读完才加入结果，中途出错时不留下半个源
+        source_lines = []
+        with open_url(url) as body:
+            reader = PlaylistReader(body.iter_chunks())
+            for line in reader:
                 line = line.strip()
                 if  "#genre#" not in line and "," in line and "://" in line and line not in excudelist_lines:
                     # 拆分成频道名和URL部分
                     # channel_name, channel_address = line.split(',', 1)
-                    all_lines.append(line.strip())
+                    source_lines.append(line.strip())
+        all_lines.extend(source_lines)
+        print(f"行数: {reader.line_count}")
 
     except Exception as e:
         print(f"处理URL时发生错误：{e}")
@@ -5,11 +5,10 @@ import urllib.request
 import re
 from urllib.error import URLError, HTTPError
 
-import cv2
-import requests
-
 import random
 
+from iptv.media import read_video_info #解析视频流头取分辨率，不用OpenCV
+
 def read_txt_to_array(file_name):
     try:
         with open(file_name, 'r', encoding='utf-8') as file:
@@ -68,22 +67,17 @@ def get_video_dimensions(url, timeout):
         start_time = time.time()
         print(f"checking url dimensions:{url}")
 
-        response = requests.head(url, timeout=timeout)
-        response.raise_for_status()
-
-        cap = cv2.VideoCapture(url)
-        if not cap.isOpened():
+        info = read_video_info(url, timeout)
+        if info is None or not info.width:
             return 0, 0, 0
 
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-        cap.release()
+        width = info.width
+        height = info.height
 
         span_time=round(time.time() - start_time, 3)
         return width, height,span_time
 
-    except (requests.RequestException, cv2.error, Exception):
+    except Exception:
         return 0, 0, 0
     
 
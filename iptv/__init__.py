@@ -0,0 +1,6 @@
+# 直播源整理的公共模块：main.py 以及 assets 下各脚本共用
+
+import os
+
+# 各种本地缓存（HTTP源、解析结果等）的根目录，GitHub Actions里用actions/cache在多次运行间保存
+CACHE_DIR = os.environ.get('IPTV_CACHE_DIR', '.cache')
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+
+from iptv import CACHE_DIR
+
+# 增量构建：每个输出分类是图里的一个节点，记录喂给它的输入（能归入它的频道名、来源及其内容、
+# 命中的黑名单条目，以及只影响输出的字典顺序、纠错条目、logo）和排在它前面的分类（分发时重复的url
+# 会落到后面的分类，所以前面的分类分发结果变了后面的也要重算）。输入和上次一样的分类直接用上次
+# 生成好的段落，只有变了的分类重新分发、渲染，再和没变的拼起来
+
+BUILD_CACHE_DIR = os.path.join(CACHE_DIR, 'build')
+
+# 分发、输出格式的逻辑有改动时加1，让上次的结果全部失效
+BUILD_GRAPH_VERSION = 1
+
+
+# 任意可JSON化的输入 → hash，dict、set先排序，结果和遍历顺序无关
+def digest(value):
+    if isinstance(value, dict):
+        value = sorted(value.items())
+    elif isinstance(value, (set, frozenset)):
+        value = sorted(value)
+    data = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class BuildGraph:
+    """增量构建的节点表。
+
+    add() 登记一个节点的输入和依赖，返回它是否需要重新生成；干净的节点用 output() 取上次的结果，
+    重新生成的节点用 set_output() 存入本次结果，最后 save() 写回缓存目录（每个节点一个json文件）。
+
+    inputs 会传给依赖这个节点的节点（依赖方看到的是 inputs 和上游的 inputs 合成的指纹），
+    local_inputs 只影响这个节点本身的输出。
+    """
+
+    def __init__(self, cache_dir=BUILD_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.nodes = {}     # 本次登记的节点 → {'upstream', 'fingerprint', 'inputs', 'dirty', 'changed'}
+        self.outputs = {}   # 节点 → 结果（干净的为上次的结果，脏的为本次set_output的）
+
+    def _path(self, node):
+        return os.path.join(self.cache_dir, node + '.json')
+
+    def _load(self, node):
+        try:
+            with open(self._path(node), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # 上次运行保存的结果，没有时为空dict；登记节点前用来取上次的频道名等
+    def previous(self, node):
+        if node not in self.outputs:
+            self.outputs[node] = self._load(node) or {}
+        return self.outputs[node].get('output', {})
+
+    def add(self, node, inputs, deps=(), local_inputs=None):
+        input_digests = {name: digest(value) for name, value in inputs.items()}
+        upstream = digest([BUILD_GRAPH_VERSION, input_digests,
+                           [(dep, self.nodes[dep]['upstream']) for dep in sorted(deps)]])
+        info = {'upstream': upstream, 'inputs': input_digests}
+        info['inputs'].update({name: digest(value) for name, value in (local_inputs or {}).items()})
+        info['fingerprint'] = digest([upstream, info['inputs']])
+        self.previous(node)
+        stored = self.outputs[node]
+        info['dirty'] = stored.get('fingerprint') != info['fingerprint']
+        info['changed'] = sorted(name for name, value in info['inputs'].items()
+                                 if stored.get('inputs', {}).get(name) != value)
+        self.nodes[node] = info
+        if info['dirty']:
+            self.outputs[node] = {}
+        return info['dirty']
+
+    def is_dirty(self, node):
+        return self.nodes[node]['dirty']
+
+    # 和上次相比变了的输入名称，打印增量构建原因用
+    def changed_inputs(self, node):
+        return self.nodes[node]['changed']
+
+    def output(self, node):
+        return self.outputs[node].get('output')
+
+    # local_inputs：要生成之后才知道取哪些的输入（如本次频道名对应的纠错条目），
+    # 按本次的值重新记录，下次add时传入的同名输入和它比较
+    def set_output(self, node, output, local_inputs=None):
+        info = self.nodes[node]
+        if local_inputs:
+            info['inputs'].update({name: digest(value) for name, value in local_inputs.items()})
+            info['fingerprint'] = digest([info['upstream'], info['inputs']])
+        self.outputs[node] = {'output': output}
+
+    # 写回本次登记的节点（干净的节点文件不动），删掉已经不存在的节点
+    def save(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for node, info in self.nodes.items():
+                if not info['dirty'] or 'output' not in self.outputs[node]:
+                    continue
+                entry = {'fingerprint': info['fingerprint'], 'inputs': info['inputs'],
+                         'output': self.outputs[node]['output']}
+                path = self._path(node)
+                tmp_path = f"{path}.tmp{os.getpid()}"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_path, path)
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json') and name[:-5] not in self.nodes:
+                    os.remove(os.path.join(self.cache_dir, name))
+        except OSError as e:
+            print(f"增量构建缓存写入失败：{e}")
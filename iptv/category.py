@@ -0,0 +1,50 @@
+# 频道→分类索引：把所有分类字典（主频道/*.txt、地方台/*.txt）以及纠错别名合成一个dict，
+# 一个频道名查一次表就得到它能进的全部分类，代替逐个字典 `name in list` 的判断
+
+
+# 读取分类字典，每行一个频道名（和iptv.util的read_txt_to_array一致，保留空行）
+def load_dictionary(file_name):
+    try:
+        with open(file_name, 'r', encoding='utf-8') as file:
+            return [line.strip() for line in file.readlines()]
+    except FileNotFoundError:
+        print(f"File '{file_name}' not found.")
+        return []
+
+
+class CategoryIndex:
+    """频道名 → 候选分类（按分发优先级排好序的元组）。
+
+    categories 为 [(分类, 字典, 关键字), ...]，顺序即分发优先级；关键字不为None的分类
+    按频道名包含该关键字匹配（如央视按"CCTV"），此时字典只用于排序。
+    aliases 为纠错表 {别名: 标准名}，别名本身不在任何字典里时按标准名归类。
+    """
+
+    def __init__(self, categories, aliases=None):
+        self.order = {key: pos for pos, (key, _, _) in enumerate(categories)}
+        self.keyword_rules = [(key, keyword) for key, _, keyword in categories if keyword]
+
+        index = {}
+        for key, dictionary, keyword in categories:
+            if keyword:
+                continue
+            for name in dictionary:
+                matched = index.setdefault(name, [])
+                if key not in matched:
+                    matched.append(key)
+        for alias, name in (aliases or {}).items():
+            if alias not in index and name in index:
+                index[alias] = index[name]
+        self.index = {name: tuple(matched) for name, matched in index.items()}
+
+    def lookup(self, name):
+        matched = self.index.get(name, ())
+        extra = [key for key, keyword in self.keyword_rules if keyword in name and key not in matched]
+        if extra:
+            matched = tuple(sorted(matched + tuple(extra), key=self.order.__getitem__))
+        return matched
+
+
+# 按配置表读入全部分类字典：[(分类, 字典文件, 关键字), ...] → {分类: 字典}
+def load_dictionaries(config):
+    return {key: load_dictionary(file_name) for key, file_name, _ in config}
@@ -0,0 +1,57 @@
+import sys
+from typing import NamedTuple
+
+# 频道记录：从分发到输出都用它，不再到处传 "频道名,URL" 字符串再反复split
+
+
+class Channel(NamedTuple):
+    """一条直播源。str() 得到txt里的 "频道名,URL" 行，只在写文件时才生成。"""
+
+    name: str
+    url: str
+    category: str = None   # 归入的分类，others为None
+    source: str = None     # 来源：urls-daily里的源地址，或whitelist_auto.txt
+    latency: float = None  # 响应时间（毫秒），目前只有whitelist里的源有
+
+    def __str__(self):
+        return f"{self.name},{self.url}"
+
+# 从 "频道名,URL" 行生成记录，频道名重复很多，intern后共用同一个字符串
+def make_channel(line, category=None, source=None, latency=None):
+    name, url = line.split(',', 1)
+    return Channel(sys.intern(name), url, category, source, latency)
+
+# 按 (频道名, URL) 去重，代替原来的set()；保留第一次出现的顺序，输出结果不再随hash变化
+def unique(channels):
+    seen = {}
+    for channel in channels:
+        seen.setdefault((channel.name, channel.url), channel)
+    return list(seen.values())
+
+# 排序键：和原来对 "频道名,URL" 字符串排序的结果一致
+def line_key(channel):
+    return f"{channel.name},{channel.url}"
+
+#纠错频道名称
+#correct_name_data(corrections_name,xxxx)
+def correct_name_data(corrections, data):
+    corrected_data = []
+    for channel in data:
+        name = channel.name
+        if name in corrections and name != corrections[name]:
+            channel = channel._replace(name=corrections[name])
+        corrected_data.append(channel)
+    return corrected_data
+
+# 按字典顺序排序，不在字典里的排在最后（sorted是稳定排序，同名的保持原来的先后）
+def sort_data(order, data):
+    # 创建一个字典来存储每行数据的索引
+    order_dict = {name: i for i, name in enumerate(order)}
+    
+    # 定义一个排序键函数，处理不在 order_dict 中的字符串
+    def sort_key(channel):
+        return order_dict.get(channel.name, len(order))
+    
+    # 按照 order 中的顺序对数据进行排序
+    sorted_data = sorted(data, key=sort_key)
+    return sorted_data
@@ -0,0 +1,56 @@
+from iptv.channel import make_channel
+from iptv.normalize import normalize_channel_name, process_name_string, process_part
+from iptv.util import clean_url
+
+# 分发直播源：normalize_channel_line只看这一行本身（清理名称、繁转简、去$），结果可以按源缓存，
+# 和字典、黑名单无关；Dispatcher再按顺序把频道放进第一个还没有这个url的分类，都重复则归入other
+
+OTHERS = "others"  # dispatch的返回值：归入other
+
+
+# "频道名,URL" 行 → (规范化后的频道名, 地址)，不是直播源的行返回None
+def normalize_channel_line(line):
+    if  "#genre#" not in line and "#EXTINF:" not in line and "," in line and "://" in line:
+        channel_name=line.split(',')[0].strip()
+        channel_name = normalize_channel_name(channel_name)  #分发前清理channel_name中特定字符、全角转半角、繁转简
+
+        channel_address=clean_url(line.split(',')[1].strip())  #把URL中$之后的内容都去掉
+        return channel_name, channel_address
+    return None
+
+
+class Dispatcher:
+    """各分类的频道记录（category_lines）和已收录的url（category_urls），以及归入other的记录。
+
+    增量构建时只有 rebuild_keys 里的分类生成记录，其余分类只记下url，
+    保证后面分类的去重结果和全量分发一样；rebuild_others 为False时不生成other的记录（url照样记下）。
+    """
+
+    def __init__(self, keys):
+        self.category_lines = {key: [] for key in keys}
+        self.category_urls = {key: set() for key in keys} # 各分类已收录的url，去重用
+        self.other_lines = []
+        self.other_lines_url = set() # 为降低other文件大小，剔除重复url添加
+        self.rebuild_keys = set(keys)
+        self.rebuild_others = True
+
+    # 分类里存的是Channel记录，source为来源，latency为响应时间（whitelist里才有）。
+    # 返回归入的分类，归入other返回OTHERS，url在other里也已经有了（丢弃）返回None
+    def dispatch(self, categories, channel_name, channel_address, source=None, latency=None):
+        line=(channel_name+","+channel_address).strip() #重新组织line
+        for key in categories:
+            urls = self.category_urls[key]
+            if channel_address not in urls: # 该分类里还没有这个url 2024-07-22 11:18
+                if key in self.rebuild_keys:
+                    channel = make_channel(process_name_string(line), key, source, latency)
+                    self.category_lines[key].append(channel)
+                    urls.add(channel.url.split(',')[0]) # 和原来一样，按存入行逗号后的第一段记录url
+                else:
+                    urls.add(process_part(channel_address.rstrip())) # 即上面存入的url
+                return key
+        if channel_address not in self.other_lines_url:
+            self.other_lines_url.add(channel_address)   #记录已加url
+            if self.rebuild_others:
+                self.other_lines.append(make_channel(line, None, source, latency))
+            return OTHERS
+        return None
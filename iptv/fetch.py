@@ -0,0 +1,246 @@
+import base64
+import hashlib
+import http.client
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import unquote, urlsplit, urljoin
+
+from iptv import http_cache
+
+# 并发下载直播源：有界线程池 + 每个host并发上限 + keep-alive连接复用
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+
+MAX_WORKERS = 16      # 同时下载的源个数
+MAX_PER_HOST = 4      # 同一个host同时下载的个数，避免被raw.githubusercontent.com之类限流
+TIMEOUT = 30          # 单个源的超时（秒），原来urlopen不设超时，卡住的源会拖住整个构建
+MAX_REDIRECTS = 5
+MAX_SOURCE_BYTES = 64 * 1024 * 1024  # 单个源的大小上限，超过的一般不是正常的直播源列表
+CHUNK_SIZE = 64 * 1024
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+class FetchError(Exception):
+    pass
+
+
+# 每个host一个信号量，限制同一host的并发数
+_host_lock = threading.Lock()
+_host_semaphores = {}
+
+def _host_semaphore(netloc, per_host):
+    with _host_lock:
+        sem = _host_semaphores.get(netloc)
+        if sem is None:
+            sem = threading.BoundedSemaphore(per_host)
+            _host_semaphores[netloc] = sem
+        return sem
+
+# 和原来的urlopen一样按 http_proxy/https_proxy/no_proxy 环境变量走代理：
+# 返回 (代理的host:端口, Proxy-Authorization头或None)，不走代理时为None
+def _proxy_for(scheme, hostname):
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(hostname or ''):
+        return None
+    if '://' not in proxy:
+        proxy = 'http://' + proxy
+    parts = urlsplit(proxy)
+    auth = None
+    if parts.username is not None:
+        credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+        auth = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+    return parts.netloc.rpartition('@')[2], auth
+
+# 每个线程各自保存已打开的连接，同一host的下一个源直接复用（keep-alive）
+_local = threading.local()
+
+# https经代理用CONNECT隧道；http经代理时连接连到代理，请求行用完整url（见_request）
+def _get_connection(scheme, netloc, timeout, proxy=None):
+    pool = getattr(_local, 'connections', None)
+    if pool is None:
+        pool = _local.connections = {}
+    key = (scheme, netloc)
+    conn = pool.get(key)
+    if conn is not None:
+        return conn, True
+    if scheme == 'https':
+        if proxy:
+            proxy_netloc, auth = proxy
+            conn = http.client.HTTPSConnection(proxy_netloc, timeout=timeout)
+            conn.set_tunnel(netloc, headers={'Proxy-Authorization': auth} if auth else None)
+        else:
+            conn = http.client.HTTPSConnection(netloc, timeout=timeout)
+    elif scheme == 'http':
+        conn = http.client.HTTPConnection(proxy[0] if proxy else netloc, timeout=timeout)
+    else:
+        raise FetchError(f"不支持的协议: {scheme}")
+    pool[key] = conn
+    return conn, False
+
+def _drop_connection(scheme, netloc):
+    pool = getattr(_local, 'connections', {})
+    conn = pool.pop((scheme, netloc), None)
+    if conn is not None:
+        conn.close()
+
+def _request(url, timeout, extra_headers=None):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    headers = {'User-Agent': USER_AGENT}
+    if extra_headers:
+        headers.update(extra_headers)
+    proxy = _proxy_for(parts.scheme, parts.hostname)
+    if proxy and parts.scheme == 'http':
+        path = f"http://{parts.netloc}{path}"
+        if proxy[1]:
+            headers['Proxy-Authorization'] = proxy[1]
+
+    # 复用的连接可能已被服务端关闭，这种情况换新连接重试一次
+    for attempt in range(2):
+        conn, reused = _get_connection(parts.scheme, parts.netloc, timeout, proxy)
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+        except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                BrokenPipeError, ConnectionResetError):
+            _drop_connection(parts.scheme, parts.netloc)
+            if reused and attempt == 0:
+                continue
+            raise
+        except Exception:
+            _drop_connection(parts.scheme, parts.netloc)
+            raise
+        return parts, response
+
+
+class SourceBody:
+    """下载到的源内容，用 iter_chunks() 按块读取。
+
+    from_cache 为 True 表示服务端返回304、内容来自本地缓存；sha256 为内容的hash，
+    来自缓存时一开始就知道，来自网络时读完全部内容后才有。
+    """
+
+    def __init__(self, url, max_bytes, response=None, cache_path=None, meta=None, writer=None):
+        self.url = url
+        self.max_bytes = max_bytes
+        self.response = response
+        self.cache_path = cache_path
+        self.writer = writer
+        self.from_cache = response is None
+        self.sha256 = meta['sha256'] if meta else None
+        self.size = 0
+        self.complete = False
+
+    def _raw_chunks(self):
+        if self.from_cache:
+            with open(self.cache_path, 'rb') as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        else:
+            # 用read(n)而不是read1(n)：读到末尾时read会关闭响应，连接才能给下一个请求复用
+            while True:
+                chunk = self.response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    def iter_chunks(self):
+        digest = hashlib.sha256()
+        for chunk in self._raw_chunks():
+            self.size += len(chunk)
+            if self.size > self.max_bytes:
+                raise FetchError(f"源内容超过{self.max_bytes // (1024 * 1024)}MB上限: {self.url}")
+            digest.update(chunk)
+            if self.writer:
+                self.writer.write(chunk)
+            yield chunk
+        self.sha256 = digest.hexdigest()
+        self.complete = True
+
+    def read(self):
+        return b''.join(self.iter_chunks())
+
+
+# 打开一个源：cache_dir不为None时走条件请求缓存（见iptv/http_cache.py），304直接读本地body；
+# 读取过程中一直占用该host的并发名额和连接，退出with后才释放
+@contextmanager
+def open_url(url, timeout=TIMEOUT, per_host=MAX_PER_HOST, cache_dir=http_cache.HTTP_CACHE_DIR,
+             max_bytes=MAX_SOURCE_BYTES):
+    cache_key = url
+    cached = http_cache.load_entry(cache_key, cache_dir) if cache_dir else None
+    headers = http_cache.conditional_headers(cached)
+
+    for _ in range(MAX_REDIRECTS + 1):
+        netloc = urlsplit(url).netloc
+        sem = _host_semaphore(netloc, per_host)
+        with sem:
+            parts, response = _request(url, timeout, headers)
+            body = None
+            try:
+                if response.status in REDIRECT_CODES:
+                    response.read()
+                    location = response.getheader('Location')
+                    if not location:
+                        raise FetchError(f"HTTP {response.status} 没有Location: {url}")
+                    url = urljoin(url, location)
+                    continue
+                if response.status == 304 and cached:
+                    response.read()
+                    body = SourceBody(url, max_bytes, cache_path=http_cache.body_path(cache_key, cache_dir), meta=cached)
+                elif response.status >= 400:
+                    response.read()
+                    raise FetchError(f"HTTP Error {response.status}: {response.reason}")
+                else:
+                    writer = None
+                    if response.status == 200:
+                        writer = http_cache.open_writer(cache_key, response.getheader('ETag'),
+                                                        response.getheader('Last-Modified'), cache_dir)
+                    body = SourceBody(url, max_bytes, response=response, writer=writer)
+                yield body
+            finally:
+                # 没有读完的响应无法复用连接
+                if body is None or body.from_cache or body.complete:
+                    if response.will_close:
+                        _drop_connection(parts.scheme, parts.netloc)
+                else:
+                    _drop_connection(parts.scheme, parts.netloc)
+                if body is not None and body.writer:
+                    if body.complete:
+                        body.writer.commit(body.sha256, body.size)
+                    else:
+                        body.writer.discard()
+            return
+    raise FetchError(f"重定向次数过多: {url}")
+
+# 下载整个源，返回bytes
+def fetch_url(url, timeout=TIMEOUT, per_host=MAX_PER_HOST, cache_dir=http_cache.HTTP_CACHE_DIR,
+              max_bytes=MAX_SOURCE_BYTES):
+    with open_url(url, timeout, per_host, cache_dir, max_bytes) as body:
+        return body.read()
+
+def _load_one(load, url):
+    try:
+        return load(url), None
+    except Exception as e:
+        return None, e
+
+# 同时下载全部源，load(url)在线程池里执行（默认整体下载，也可以边下载边解析），
+# 但按urls原来的顺序依次交出结果 (url, result, error)，保证后面的分发顺序和输出结果不受下载快慢影响；
+# 前面的源处理时后面的源仍在下载
+def fetch_all(urls, load=fetch_url, max_workers=MAX_WORKERS):
+    urls = list(urls)
+    if not urls:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        futures = [executor.submit(_load_one, load, url) for url in urls]
+        for url, future in zip(urls, futures):
+            result, error = future.result()
+            yield url, result, error
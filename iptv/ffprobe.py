@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+# ffprobe检测：rtmp/rtsp源的可用性和各种源的分辨率都要起ffprobe子进程，每个子进程光启动就要几十毫秒。
+# 所有ffprobe都放到这里的专用线程池里运行，同时运行的子进程数单独限制，和http检测的并发无关；
+# 同一个url一次运行里只调用一次ffprobe，一次调用同时得到是否可用和分辨率
+
+# 同时运行的ffprobe子进程个数，可以用环境变量调整
+FFPROBE_WORKERS = int(os.environ.get('IPTV_FFPROBE_WORKERS', min(16, 2 * (os.cpu_count() or 1))))
+FFPROBE_TIMEOUT = 8   # 单个ffprobe子进程的超时（秒），在线程池里排队的时间不算
+
+
+# 一个url的ffprobe结果：ok为ffprobe能否打开，width/height为第一路视频的分辨率（没有视频流时为None），
+# error为打不开的原因，elapsed为子进程运行的时间（毫秒，不含在线程池里排队的时间）
+class StreamInfo(NamedTuple):
+    ok: bool
+    width: int
+    height: int
+    error: str
+    elapsed: float
+
+
+_executor = None
+_results = {}  # {url: Future}，同一个url并发提交也只运行一次
+_lock = threading.Lock()
+
+
+def run_ffprobe(url, timeout=FFPROBE_TIMEOUT):
+    command = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries',
+        'stream=width,height', '-of', 'json', url
+    ]
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                errors='replace', timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return StreamInfo(False, None, None, f"ffprobe超时（超过 {timeout} 秒）", None)
+    except OSError as e:
+        return StreamInfo(False, None, None, f"ffprobe启动失败: {e}", None)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return StreamInfo(False, None, None, lines[-1] if lines else f"ffprobe退出码 {result.returncode}", elapsed)
+    try:
+        streams = json.loads(result.stdout).get('streams') or [{}]
+    except ValueError:
+        streams = [{}]
+    return StreamInfo(True, streams[0].get('width'), streams[0].get('height'), None, elapsed)
+
+# 提交一个url，返回 concurrent.futures.Future（结果为StreamInfo）；已经提交过的直接返回原来的Future，
+# timeout以第一次提交的为准。协程里用 await asyncio.wrap_future(...) 等结果，不占检测线程
+def submit_ffprobe(url, timeout=FFPROBE_TIMEOUT):
+    global _executor
+    with _lock:
+        future = _results.get(url)
+        if future is None:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=FFPROBE_WORKERS, thread_name_prefix='ffprobe')
+            future = _results[url] = _executor.submit(run_ffprobe, url, timeout)
+        return future
+
+# 阻塞等一个url的ffprobe结果
+def probe_stream(url, timeout=FFPROBE_TIMEOUT):
+    return submit_ffprobe(url, timeout).result()
+
+# 本次运行实际调用ffprobe的url个数
+def ffprobe_calls():
+    return len(_results)
@@ -0,0 +1,91 @@
+import re
+from typing import NamedTuple
+from urllib.parse import urljoin
+
+from iptv.probe import TIMEOUT, ProbeError, check_http, fetch_http
+
+# HLS检测：不起ffprobe，直接读m3u8。主清单（master playlist）每个#EXT-X-STREAM-INF上一般写着RESOLUTION和BANDWIDTH，
+# 选码率最高的一路跟进它的子清单（media playlist），再用Range读最新一个分片的开头，确认真的能拿到数据。
+# 每个url只要两三次很小的http请求；清单里没写分辨率时才需要调用方退回ffprobe
+
+MAX_MANIFEST_BYTES = 1024 * 1024
+MAX_DEPTH = 3  # 主清单嵌套主清单的情况最多跟这么多层
+
+_ATTRIBUTE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+# 主清单里的一路：uri已经按清单的url转成绝对地址，没写的属性为None
+class Variant(NamedTuple):
+    uri: str
+    bandwidth: int
+    width: int
+    height: int
+
+
+# 一个m3u8的检测结果：ok为最新的分片能读到视频/音频数据，分辨率和码率（bps）取自选中的那一路，清单里没写时为None；
+# segment为最新的分片的url
+class HlsInfo(NamedTuple):
+    ok: bool
+    width: int
+    height: int
+    bandwidth: int
+    segment: str
+
+
+# #EXT-X-STREAM-INF: 后面的属性表，引号里可以有逗号（如CODECS）
+def parse_attributes(text):
+    return {name: value.strip('"') for name, value in _ATTRIBUTE.findall(text)}
+
+def _int(value):
+    return int(value) if value and value.isdigit() else None
+
+def _variant(uri, attributes):
+    width, _, height = attributes.get('RESOLUTION', '').lower().partition('x')
+    if _int(width) is None or _int(height) is None:
+        width = height = None
+    return Variant(uri, _int(attributes.get('BANDWIDTH')), _int(width), _int(height))
+
+# 解析m3u8，返回 (各路Variant, 分片url)：主清单只有前者，子清单只有后者
+def parse_playlist(text, base_url):
+    variants = []
+    segments = []
+    attributes = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            attributes = parse_attributes(line[len('#EXT-X-STREAM-INF:'):])
+        elif line.startswith('#'):
+            continue
+        elif attributes is not None:
+            variants.append(_variant(urljoin(base_url, line), attributes))
+            attributes = None
+        else:
+            segments.append(urljoin(base_url, line))
+    return variants, segments
+
+def _is_m3u8(text):
+    return text.lstrip('\ufeff \t\r\n').startswith('#EXTM3U')
+
+# 检测一个m3u8地址，返回HlsInfo；下载出错时抛异常（ProbeError/ConnectError，和check_http一样）
+async def probe_hls(url, timeout=TIMEOUT):
+    variant = None
+    for _ in range(MAX_DEPTH):
+        url, data = await fetch_http(url, timeout, MAX_MANIFEST_BYTES)
+        text = data.decode('utf-8', errors='replace')
+        if not _is_m3u8(text):
+            raise ProbeError("不是m3u8")
+        variants, segments = parse_playlist(text, url)
+        if not variants:
+            break
+        variant = max(variants, key=lambda variant: variant.bandwidth or 0)
+        url = variant.uri
+    else:
+        raise ProbeError("m3u8嵌套过深")
+    if not segments:
+        raise ProbeError("m3u8里没有分片")
+    kind = await check_http(segments[-1], timeout)  # 直播的最新分片在最后
+    if variant is None:
+        return HlsInfo(kind is not None, None, None, None, segments[-1])
+    return HlsInfo(kind is not None, variant.width, variant.height, variant.bandwidth, segments[-1])
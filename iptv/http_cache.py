@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from iptv import CACHE_DIR
+
+# 上游源的条件请求缓存：保存body和ETag/Last-Modified，下次请求带上
+# If-None-Match/If-Modified-Since，服务端返回304时直接用本地body
+
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, 'http')
+
+
+def _entry_path(cache_dir, url):
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key)
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# 读取缓存的元数据，body文件缺失或损坏时当作没有缓存
+def load_entry(url, cache_dir=HTTP_CACHE_DIR):
+    path = _entry_path(cache_dir, url)
+    try:
+        with open(path + '.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('url') != url or not os.path.exists(path + '.body'):
+        return None
+    return meta
+
+# 根据缓存的元数据生成条件请求头
+def conditional_headers(meta):
+    headers = {}
+    if not meta:
+        return headers
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+def body_path(url, cache_dir=HTTP_CACHE_DIR):
+    return _entry_path(cache_dir, url) + '.body'
+
+# 边下载边写入缓存：先写临时文件，完整读完后再替换正式的body和元数据；
+# 没有ETag和Last-Modified的源无法做条件请求，不缓存
+class EntryWriter:
+    def __init__(self, url, etag, last_modified, cache_dir=HTTP_CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.path = _entry_path(cache_dir, url)
+        self.tmp_path = f"{self.path}.body.tmp{os.getpid()}_{id(self)}"
+        self.file = open(self.tmp_path, 'wb')
+
+    def write(self, chunk):
+        self.file.write(chunk)
+
+    def commit(self, sha256, size):
+        self.file.close()
+        meta = {
+            'url': self.url,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'sha256': sha256,
+            'size': size,
+            'saved': int(time.time()),
+        }
+        # 先写body再写元数据，load_entry只认元数据里的url
+        os.replace(self.tmp_path, self.path + '.body')
+        _write_atomic(self.path + '.json', json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        return meta
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+def open_writer(url, etag, last_modified, cache_dir=HTTP_CACHE_DIR):
+    if not cache_dir or (not etag and not last_modified):
+        return None
+    return EntryWriter(url, etag, last_modified, cache_dir)
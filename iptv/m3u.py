@@ -0,0 +1,57 @@
+# 生成m3u：直接用内存里的txt行（字符串或Channel记录），不再把刚写好的txt重新读进来；
+# logo按频道名建dict，找不到时按纠错表的标准名再找一次
+
+M3U_HEADER = '#EXTM3U x-tvg-url="https://live.fanmingming.com/e.xml.gz"\n'
+
+
+# 读入logo库 "频道名,logo地址"，同名的以第一条为准
+def load_logo_index(file_name):
+    logos = {}
+    try:
+        with open(file_name, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split(',')
+                if len(parts) == 2: #跳过空行和格式不对的行
+                    logos.setdefault(parts[0], parts[1])
+    except FileNotFoundError:
+        print(f"File '{file_name}' not found.")
+    return logos
+
+def find_logo(logos, channel_name, aliases=None):
+    logo_url = logos.get(channel_name)
+    if logo_url is None and aliases:
+        correct_name = aliases.get(channel_name)
+        if correct_name is not None:
+            logo_url = logos.get(correct_name)
+    return logo_url
+
+# 和写成txt再按行读回来一样：'\n' 之类的元素拆成空行
+def iter_txt_lines(items):
+    for item in items:
+        line = str(item)
+        if "\n" in line:
+            yield from line.split("\n")
+        else:
+            yield line
+
+# 逐行生成m3u内容（第一行为文件头），txt里 "频道名,URL" 之外（逗号个数不对）的行跳过
+def render_m3u(items, logos, aliases=None):
+    yield M3U_HEADER
+    yield from render_m3u_entries(items, logos, aliases)
+
+# 不带文件头的部分；每个段落以 "标题,#genre#" 开头，所以可以按段落分别生成再拼接
+def render_m3u_entries(items, logos, aliases=None):
+    group_name = ""
+    for line in iter_txt_lines(items):
+        parts = line.split(",")
+        if len(parts) != 2:
+            continue
+        if "#genre#" in line:
+            group_name = parts[0]
+            continue
+        channel_name, channel_url = parts
+        logo_url = find_logo(logos, channel_name, aliases)
+        if logo_url is None:  #not found logo
+            yield f"#EXTINF:-1 group-title=\"{group_name}\",{channel_name}\n{channel_url}\n"
+        else:
+            yield f"#EXTINF:-1  tvg-name=\"{channel_name}\" tvg-logo=\"{logo_url}\"  group-title=\"{group_name}\",{channel_name}\n{channel_url}\n"
@@ -0,0 +1,385 @@
+import asyncio
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from iptv.hls import probe_hls
+from iptv.probe import TIMEOUT, TS_PACKET, close_idle_connections, read_stream, sniff_media
+
+# 视频流头部解析：不起ffprobe/OpenCV，直接读TS或FLV流开头的几百KB，
+# TS按PAT → PMT找到视频PID，FLV找视频tag里的解码配置，再解码H.264/H.265的SPS（或MPEG-2的序列头）
+# 得到分辨率和编码；帧率按视频帧的时间戳算，时间戳不够时用SPS里的timing信息
+
+MEDIA_HEADER_BYTES = 512 * 1024  # 最多读这么多
+PARSE_STEP = 64 * 1024  # 边读边解析，每多读这么多试一次
+FPS_SAMPLES = 8         # 算帧率至少要的视频帧时间戳个数
+
+# TS的PMT里的stream_type
+STREAM_TYPES = {0x01: 'mpeg2', 0x02: 'mpeg2', 0x1b: 'h264', 0x24: 'hevc'}
+MPEG2_FRAME_RATES = {1: 24000 / 1001, 2: 24, 3: 25, 4: 30000 / 1001, 5: 30, 6: 50, 7: 60000 / 1001, 8: 60}
+# H.264里带chroma_format_idc等字段的profile
+_H264_HIGH_PROFILES = {100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135}
+
+
+# 一路视频的信息：codec为'h264'、'hevc'、'mpeg2'，m3u8清单里只写了分辨率时codec、fps为None
+class MediaInfo(NamedTuple):
+    codec: str
+    width: int
+    height: int
+    fps: float
+
+
+class BitReader:
+    """按位读SPS：u(n) 读n位无符号数，ue()/se() 读指数哥伦布编码，读过头时抛IndexError。"""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def u(self, bits):
+        value = 0
+        for _ in range(bits):
+            value = (value << 1) | ((self.data[self.pos >> 3] >> (7 - (self.pos & 7))) & 1)
+            self.pos += 1
+        return value
+
+    def skip(self, bits):
+        self.pos += bits
+
+    def ue(self):
+        zeros = 0
+        while self.u(1) == 0:
+            zeros += 1
+            if zeros > 31:
+                raise IndexError("无效的指数哥伦布编码")
+        return (1 << zeros) - 1 + self.u(zeros)
+
+    def se(self):
+        value = self.ue()
+        return (value + 1) // 2 if value & 1 else -(value // 2)
+
+
+# 去掉防竞争字节（00 00 03 → 00 00）
+def _unescape(nal):
+    return nal.replace(b'\x00\x00\x03', b'\x00\x00')
+
+def _skip_scaling_list(r, size):
+    last = next_scale = 8
+    for _ in range(size):
+        if next_scale != 0:
+            next_scale = (last + r.se() + 256) % 256
+        last = next_scale or last
+
+# H.264的SPS（含1字节NAL头），返回 (宽, 高, 帧率)，VUI里没有timing信息时帧率为None
+def parse_h264_sps(nal):
+    r = BitReader(_unescape(nal[1:]))
+    profile_idc = r.u(8)
+    r.skip(16)  # constraint_set标志、level_idc
+    r.ue()      # seq_parameter_set_id
+    chroma_format_idc = 1
+    separate_colour_plane = 0
+    if profile_idc in _H264_HIGH_PROFILES:
+        chroma_format_idc = r.ue()
+        if chroma_format_idc == 3:
+            separate_colour_plane = r.u(1)
+        r.ue()  # bit_depth_luma_minus8
+        r.ue()  # bit_depth_chroma_minus8
+        r.skip(1)
+        if r.u(1):  # seq_scaling_matrix_present_flag
+            for i in range(8 if chroma_format_idc != 3 else 12):
+                if r.u(1):
+                    _skip_scaling_list(r, 16 if i < 6 else 64)
+    r.ue()  # log2_max_frame_num_minus4
+    pic_order_cnt_type = r.ue()
+    if pic_order_cnt_type == 0:
+        r.ue()
+    elif pic_order_cnt_type == 1:
+        r.skip(1)
+        r.se()
+        r.se()
+        for _ in range(r.ue()):
+            r.se()
+    r.ue()      # max_num_ref_frames
+    r.skip(1)
+    width_mbs = r.ue() + 1
+    height_map_units = r.ue() + 1
+    frame_mbs_only = r.u(1)
+    if not frame_mbs_only:
+        r.skip(1)
+    r.skip(1)
+    width = width_mbs * 16
+    height = (2 - frame_mbs_only) * height_map_units * 16
+    if r.u(1):  # frame_cropping_flag
+        left, right, top, bottom = r.ue(), r.ue(), r.ue(), r.ue()
+        chroma_array_type = 0 if separate_colour_plane else chroma_format_idc
+        crop_x = 1 if chroma_array_type in (0, 3) else 2
+        crop_y = (2 if chroma_array_type == 1 else 1) * (2 - frame_mbs_only)
+        width -= crop_x * (left + right)
+        height -= crop_y * (top + bottom)
+    fps = None
+    if r.u(1):  # vui_parameters_present_flag
+        if r.u(1) and r.u(8) == 255:  # aspect_ratio_info_present_flag、Extended_SAR
+            r.skip(32)
+        if r.u(1):
+            r.skip(1)
+        if r.u(1):  # video_signal_type_present_flag
+            r.skip(4)
+            if r.u(1):
+                r.skip(24)
+        if r.u(1):
+            r.ue()
+            r.ue()
+        if r.u(1):  # timing_info_present_flag
+            num_units_in_tick = r.u(32)
+            time_scale = r.u(32)
+            if num_units_in_tick and time_scale:
+                fps = time_scale / (2 * num_units_in_tick)
+    return width, height, fps
+
+# H.265的SPS（含2字节NAL头），返回 (宽, 高)
+def parse_hevc_sps(nal):
+    r = BitReader(_unescape(nal[2:]))
+    r.skip(4)   # sps_video_parameter_set_id
+    max_sub_layers_minus1 = r.u(3)
+    r.skip(1)
+    r.skip(96)  # general_profile_tier_level、general_level_idc
+    sub_layers = [(r.u(1), r.u(1)) for _ in range(max_sub_layers_minus1)]
+    if max_sub_layers_minus1:
+        r.skip(2 * (8 - max_sub_layers_minus1))
+    for profile_present, level_present in sub_layers:
+        r.skip(88 * profile_present + 8 * level_present)
+    r.ue()      # sps_seq_parameter_set_id
+    chroma_format_idc = r.ue()
+    separate_colour_plane = r.u(1) if chroma_format_idc == 3 else 0
+    width = r.ue()
+    height = r.ue()
+    if r.u(1):  # conformance_window_flag
+        left, right, top, bottom = r.ue(), r.ue(), r.ue(), r.ue()
+        chroma_array_type = 0 if separate_colour_plane else chroma_format_idc
+        width -= (2 if chroma_array_type in (1, 2) else 1) * (left + right)
+        height -= (2 if chroma_array_type == 1 else 1) * (top + bottom)
+    return width, height
+
+# MPEG-2的序列头（00 00 01 B3之后），返回 (宽, 高, 帧率)
+def parse_mpeg2_sequence(data):
+    if len(data) < 4:
+        raise IndexError("序列头不完整")
+    width = (data[0] << 4) | (data[1] >> 4)
+    height = ((data[1] & 0x0f) << 8) | data[2]
+    return width, height, MPEG2_FRAME_RATES.get(data[3] & 0x0f)
+
+def _is_sequence_header(codec, header):
+    if codec == 'h264':
+        return header & 0x1f == 7
+    if codec == 'hevc':
+        return (header >> 1) & 0x3f == 33
+    return header == 0xb3
+
+# 在ES（Annex B，00 00 01分隔的NAL）里找序列参数，返回 ((宽, 高, 帧率) 或None, 还没收全的NAL的起始位置)；
+# 最后一个NAL可能还没收全，等数据多了再解析
+def _parse_es(codec, es):
+    start = es.find(b'\x00\x00\x01')
+    while start != -1:
+        end = es.find(b'\x00\x00\x01', start + 3)
+        if end == -1:
+            return None, start
+        if end > start + 3 and _is_sequence_header(codec, es[start + 3]):
+            unit = bytes(es[start + 3:end])
+            try:
+                if codec == 'h264':
+                    return parse_h264_sps(unit), end
+                if codec == 'hevc':
+                    return (*parse_hevc_sps(unit), None), end
+                return parse_mpeg2_sequence(unit[1:]), end
+            except IndexError:
+                pass
+        start = end
+    return None, max(0, len(es) - 2)
+
+# 按时间戳算帧率（clock为时间戳每秒的刻度），不够FPS_SAMPLES个时返回None
+def _frame_rate(timestamps, clock):
+    timestamps = sorted(set(timestamps))
+    if len(timestamps) < FPS_SAMPLES or timestamps[-1] == timestamps[0]:
+        return None
+    return (len(timestamps) - 1) * clock / (timestamps[-1] - timestamps[0])
+
+def _media_info(codec, parsed, timestamps, clock):
+    width, height, sps_fps = parsed
+    fps = _frame_rate(timestamps, clock) or sps_fps
+    return MediaInfo(codec, width, height, round(fps, 2) if fps else None)
+
+# 一个PSI表（PAT/PMT）从packet的payload里取出来：跳过pointer_field，返回section（不含CRC）
+def _psi_section(payload):
+    section = payload[1 + payload[0]:]
+    length = ((section[1] & 0x0f) << 8) | section[2]
+    return section[:3 + length - 4]
+
+def _pes_pts(payload):
+    if payload[7] & 0x80:
+        p = payload[9:14]
+        return ((p[0] >> 1) & 0x07) << 30 | p[1] << 22 | (p[2] >> 1) << 15 | p[3] << 7 | p[4] >> 1
+    return None
+
+# 解析TS流开头，返回MediaInfo，找不到视频的序列参数时返回None
+def parse_ts(data):
+    sync = next((pos for pos in range(min(TS_PACKET, len(data) - TS_PACKET))
+                 if data[pos] == 0x47 and data[pos + TS_PACKET] == 0x47), None)
+    if sync is None:
+        return None
+    pmt_pids = set()
+    video_pid = codec = None
+    es = bytearray()
+    timestamps = []
+    parsed = None
+    for pos in range(sync, len(data) - TS_PACKET + 1, TS_PACKET):
+        packet = data[pos:pos + TS_PACKET]
+        if packet[0] != 0x47:
+            continue
+        pid = ((packet[1] & 0x1f) << 8) | packet[2]
+        unit_start = packet[1] & 0x40
+        adaptation = (packet[3] >> 4) & 0x03
+        if not adaptation & 0x01:
+            continue
+        payload = packet[5 + packet[4]:] if adaptation == 0x03 else packet[4:]
+        try:
+            if pid == 0 and unit_start and not pmt_pids:
+                section = _psi_section(payload)
+                for entry in range(8, len(section) - 3, 4):
+                    program = (section[entry] << 8) | section[entry + 1]
+                    if program:
+                        pmt_pids.add(((section[entry + 2] & 0x1f) << 8) | section[entry + 3])
+            elif pid in pmt_pids and unit_start and video_pid is None:
+                section = _psi_section(payload)
+                entry = 12 + (((section[10] & 0x0f) << 8) | section[11])
+                while entry + 5 <= len(section):
+                    stream_type = section[entry]
+                    if stream_type in STREAM_TYPES:
+                        video_pid = ((section[entry + 1] & 0x1f) << 8) | section[entry + 2]
+                        codec = STREAM_TYPES[stream_type]
+                        break
+                    entry += 5 + (((section[entry + 3] & 0x0f) << 8) | section[entry + 4])
+            elif pid == video_pid:
+                if unit_start:
+                    if payload[:3] != b'\x00\x00\x01':
+                        continue
+                    pts = _pes_pts(payload)
+                    if pts is not None:
+                        timestamps.append(pts)
+                    payload = payload[9 + payload[8]:]
+                if parsed is None:
+                    es += payload
+                    parsed, consumed = _parse_es(codec, es)
+                    del es[:consumed]
+        except IndexError:  # 残缺的表、PES头
+            continue
+    if parsed is None:
+        return None
+    return _media_info(codec, parsed, timestamps, 90000)
+
+# FLV视频tag里的AVC/HEVC解码配置（AVCDecoderConfigurationRecord/HEVCDecoderConfigurationRecord），返回里面的SPS
+def _config_sps(codec, record):
+    if codec == 'h264':
+        if len(record) < 8 or not record[5] & 0x1f:
+            return None
+        length = (record[6] << 8) | record[7]
+        return record[8:8 + length]
+    pos = 23
+    for _ in range(record[22] if len(record) > 22 else 0):
+        nal_type = record[pos] & 0x3f
+        count = (record[pos + 1] << 8) | record[pos + 2]
+        pos += 3
+        for _ in range(count):
+            length = (record[pos] << 8) | record[pos + 1]
+            if nal_type == 33:
+                return record[pos + 2:pos + 2 + length]
+            pos += 2 + length
+    return None
+
+# FLV里的视频编码：传统格式codec id 7=AVC、12=HEVC（国内扩展），Enhanced RTMP按FourCC
+_FLV_CODECS = {7: 'h264', 12: 'hevc'}
+_FLV_FOURCCS = {b'avc1': 'h264', b'hvc1': 'hevc'}
+
+# 解析FLV流开头，返回MediaInfo，找不到视频的解码配置时返回None
+def parse_flv(data):
+    if len(data) < 9 or not data.startswith(b'FLV'):
+        return None
+    pos = int.from_bytes(data[5:9], 'big') + 4  # 跳过文件头和PreviousTagSize0
+    timestamps = []
+    parsed = codec = None
+    while pos + 11 <= len(data):
+        tag_type = data[pos] & 0x1f
+        size = int.from_bytes(data[pos + 1:pos + 4], 'big')
+        timestamp = int.from_bytes(data[pos + 4:pos + 7], 'big') | (data[pos + 7] << 24)
+        body = data[pos + 11:pos + 11 + size]
+        pos += 11 + size + 4
+        if tag_type != 9 or not body:
+            continue
+        timestamps.append(timestamp)
+        if parsed is not None or len(body) < size:
+            continue
+        if body[0] & 0x80:  # Enhanced RTMP：低4位为包类型，0为解码配置
+            codec = _FLV_FOURCCS.get(body[1:5])
+            record = body[5:] if body[0] & 0x0f == 0 else None
+        else:
+            codec = _FLV_CODECS.get(body[0] & 0x0f)
+            record = body[5:] if len(body) > 1 and body[1] == 0 else None
+        if codec is None or record is None:
+            continue
+        try:
+            sps = _config_sps(codec, record)
+            if sps:
+                parsed = parse_h264_sps(sps) if codec == 'h264' else (*parse_hevc_sps(sps), None)
+        except IndexError:
+            continue
+    if parsed is None:
+        return None
+    return _media_info(codec, parsed, timestamps, 1000)
+
+# 按内容判断是TS还是FLV并解析，其他内容返回None
+def parse_media_header(data):
+    kind = sniff_media(bytes(data[:2048]))
+    if kind == 'ts':
+        return parse_ts(data)
+    if kind == 'flv':
+        return parse_flv(data)
+    return None
+
+# 边读边解析：每多读PARSE_STEP试一次，分辨率和帧率都有了就不用再读；读到的是m3u8也不用再读
+def _header_done():
+    checked = 0
+
+    def done(data):
+        nonlocal checked
+        if data.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'#EXTM3U'):
+            return True
+        if len(data) - checked < PARSE_STEP:
+            return False
+        checked = len(data)
+        info = parse_media_header(data)
+        return info is not None and info.fps is not None
+
+    return done
+
+# 读TS/FLV流开头解析视频信息，读不到视频的序列参数时返回None；请求出错时抛异常（和check_http一样）
+async def probe_media(url, timeout=TIMEOUT):
+    data = await read_stream(url, timeout, MEDIA_HEADER_BYTES, _header_done())
+    return parse_media_header(data)
+
+# 取一个http(s)直播源的视频信息：m3u8先看清单里写的分辨率，没写的解析最新一个分片；TS/FLV直接解析开头
+async def probe_video(url, timeout=TIMEOUT):
+    if not urlsplit(url).path.endswith('.m3u8'):
+        data = await read_stream(url, timeout, MEDIA_HEADER_BYTES, _header_done())
+        if sniff_media(data[:2048]) != 'm3u8':
+            return parse_media_header(data)
+    info = await probe_hls(url, timeout)
+    if info.width:
+        return MediaInfo(None, info.width, info.height, None)
+    return await probe_media(info.segment, timeout)
+
+# probe_video的同步版本，给不在事件循环里的脚本用：每次一个事件循环，结束时关掉空闲连接
+def read_video_info(url, timeout=TIMEOUT):
+    async def run():
+        try:
+            return await probe_video(url, timeout)
+        finally:
+            close_idle_connections()
+    return asyncio.run(run())
@@ -0,0 +1,88 @@
+import functools
+import re
+
+from iptv.t2s import traditional_to_simplified
+
+# 频道名规范化：删除特定字符、全角转半角、繁转简、CCTV/卫视名称整理。
+# 替换用预编译的正则和translate表，按原始名称缓存结果
+
+# 添加channel_name前剔除部分特定字符
+removal_list = ["_电信", "电信", "高清", "频道", "（HD）", "-HD","英陆","_ITV","(北美)","(HK)","AKtv","「IPV4」","「IPV6」",
+                "频陆","备陆","壹陆","贰陆","叁陆","肆陆","伍陆","陆陆","柒陆", "频晴","频粤","[超清]","高清","超清","斯特",
+                "粤陆", "国陆","肆柒","频英","频特","频国","频壹","频贰","肆贰","频测","咪咕"]
+
+# 全角字母、数字、＋－和全角空格转半角；｜（）：等全角标点不转，字典和纠错表里的名称就是这么写的
+FULLWIDTH_TABLE = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)
+                   if chr(code).isalnum() or chr(code) in "＋－"}
+FULLWIDTH_TABLE[0x3000] = " "
+
+
+# 要删除的字符串也转成半角，和转换后的名称对得上
+_removal_items = tuple(item.translate(FULLWIDTH_TABLE) for item in removal_list)
+
+@functools.lru_cache(maxsize=65536)
+def clean_channel_name(channel_name):
+    channel_name = channel_name.translate(FULLWIDTH_TABLE)
+
+    # 按removal_list的顺序逐个replace，每项只删一遍（和原来一样，"频频道道"→"频道"、"频国陆"→"频"），
+    # 不能合成一个正则：正则按位置取最左最长的，结果不一样
+    for item in _removal_items:
+        if item in channel_name:
+            channel_name = channel_name.replace(item, "")
+
+    # 检查并移除末尾的 'HD'
+    if channel_name.endswith("HD"):
+        channel_name = channel_name[:-2]  # 去掉最后两个字符 "HD"
+
+    if channel_name.endswith("台") and len(channel_name) > 3:
+        channel_name = channel_name[:-1]  # 去掉最后两个字符 "台"
+
+    return channel_name
+
+# 分发前清理channel_name中特定字符，再繁转简
+@functools.lru_cache(maxsize=65536)
+def normalize_channel_name(channel_name):
+    return traditional_to_simplified(clean_channel_name(channel_name))
+
+
+_cctv_4k_8k = re.compile(r'4K|8K')
+_cctv_4k_8k_tail = re.compile(r'(4K|8K).*')
+_cctv_4k_8k_bracket = re.compile(r'(4K|8K)')
+_weishi_suffix = re.compile(r'卫视「.*」')
+
+def process_name_string(input_str):
+    return ','.join(process_part(part) for part in input_str.split(','))
+
+def process_part(part_str):
+    if "://" in part_str:
+        # URL部分不做CCTV处理，只有"卫视"规则可能生效
+        if "卫视" in part_str:
+            return _weishi_suffix.sub('卫视', part_str)
+        return part_str
+    return _process_name_part(part_str)
+
+@functools.lru_cache(maxsize=65536)
+def _process_name_part(part_str):
+    # 处理逻辑
+    if "CCTV" in part_str:
+        part_str=part_str.replace("IPV6", "")  #先剔除IPV6字样
+        part_str=part_str.replace("PLUS", "+")  #替换PLUS
+        part_str=part_str.replace("1080", "")  #替换1080
+        filtered_str = ''.join(char for char in part_str if char.isdigit() or char == 'K' or char == '+')
+        if not filtered_str.strip(): #处理特殊情况，如果发现没有找到频道数字返回原名称
+            filtered_str=part_str.replace("CCTV", "")
+
+        if len(filtered_str) > 2 and _cctv_4k_8k.search(filtered_str):   # 特殊处理CCTV中部分4K和8K名称
+            # 使用正则表达式替换，删除4K或8K后面的字符，并且保留4K或8K
+            filtered_str = _cctv_4k_8k_tail.sub(r'\1', filtered_str)
+            if len(filtered_str) > 2:
+                # 给4K或8K添加括号
+                filtered_str = _cctv_4k_8k_bracket.sub(r'(\1)', filtered_str)
+
+        return "CCTV"+filtered_str
+
+    elif "卫视" in part_str:
+        # 匹配“卫视”后面的「」内容，替换为空
+        return _weishi_suffix.sub('卫视', part_str)
+
+    return part_str
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import threading
+
+from iptv import CACHE_DIR
+
+# 源解析结果缓存：key = 源内容hash + 清理规则等输入的hash，
+# 内容没变的源直接取出已经清理、繁转简好的结果，跳过解析（归类在主线程按字典做，字典变了不用重新解析）
+
+PARSE_CACHE_DIR = os.path.join(CACHE_DIR, 'parsed')
+SOURCE_INDEX = 'sources.json'  # {源: 上次用到的key}，下载失败的源靠它保留缓存
+
+# 解析、清理、归类的逻辑有改动时加1，让旧缓存全部失效
+PARSE_CACHE_VERSION = 5
+
+
+# 把清理规则等输入合成一个hash
+def inputs_fingerprint(*inputs):
+    h = hashlib.sha256(f"v{PARSE_CACHE_VERSION}".encode('utf-8'))
+    for item in inputs:
+        if isinstance(item, dict):
+            item = sorted(item.items())
+        elif isinstance(item, (set, frozenset)):
+            item = sorted(item)
+        h.update(json.dumps(item, ensure_ascii=False).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+# content_sha256 为源内容的sha256（十六进制），下载时边读边算，304时取自HTTP缓存的元数据
+def source_key(content_sha256, fingerprint, kind=''):
+    h = hashlib.sha256(f"{content_sha256}\0{kind}\0{fingerprint}".encode('utf-8'))
+    return h.hexdigest()
+
+def _entry_path(key, cache_dir):
+    return os.path.join(cache_dir, key + '.json')
+
+def load(key, cache_dir=PARSE_CACHE_DIR):
+    try:
+        with open(_entry_path(key, cache_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# 在下载线程里调用，内容相同的两个源会同时写同一个key，临时文件按线程区分；
+# 缓存写失败不影响本次结果
+def save(key, result, cache_dir=PARSE_CACHE_DIR):
+    path = _entry_path(key, cache_dir)
+    tmp_path = f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"解析缓存写入失败：{e}")
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, SOURCE_INDEX), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# 运行结束时在主线程调用：source_keys为本次每个源用到的key {源: key}，failed为本次下载失败的源，
+# 它们保留上次的缓存（下次下载成功、内容没变时直接用），其余没用到的删除，避免目录无限增长
+def prune(source_keys, failed=(), cache_dir=PARSE_CACHE_DIR):
+    index = _load_index(cache_dir)
+    keep = dict(source_keys)
+    for url in failed:
+        if url in index:
+            keep[url] = index[url]
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+    index_path = os.path.join(cache_dir, SOURCE_INDEX)
+    tmp_path = f"{index_path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(keep, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"解析缓存写入失败：{e}")
+    used_keys = set(keep.values())
+    for name in names:
+        if name.endswith('.json') and name != SOURCE_INDEX and name[:-5] not in used_keys:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
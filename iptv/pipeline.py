@@ -0,0 +1,708 @@
+import functools
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from iptv import parse_cache #源解析结果缓存
+from iptv import t2s #繁转简（共用转换器+缓存）
+from iptv.build_graph import BuildGraph, digest #增量构建
+from iptv.category import CategoryIndex, load_dictionaries #频道分类索引
+from iptv.channel import correct_name_data, line_key, sort_data, unique #频道记录
+from iptv.dispatch import OTHERS, Dispatcher, normalize_channel_line #清理、分发
+from iptv.m3u import M3U_HEADER, load_logo_index, render_m3u_entries #生成m3u
+from iptv.normalize import removal_list #频道名规范化
+from iptv.publish import publish, render_txt #输出文件发布
+from iptv.report import RunReport #运行报告
+from iptv.util import read_txt_to_array #读取文本
+
+# 直播源聚合流程（原来的main.py）：import时不读任何文件、不下载，字典、纠错表、黑名单等第一次用到时才加载；
+# 其他脚本可以只取需要的部分（如 load_category_index），完整流程由 main() 执行（python main.py）。
+# 第三方库（opencc）也是第一次用到时才import；只要读文本、去$这类小工具的脚本用iptv.util
+
+#read BlackList 2024-06-17 15:02
+# blacklist_auto.txt由检测流程生成，还没生成时当作空的
+def read_blacklist_from_txt(file_path):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        print(f"File '{file_path}' not found.")
+        return []
+
+    BlackList = [line.split(',')[1].strip() for line in lines if ',' in line]
+    return BlackList
+
+@functools.lru_cache(maxsize=None)
+def load_blacklist():
+    blacklist_auto=read_blacklist_from_txt('assets/blacklist1/blacklist_auto.txt')
+    blacklist_manual=read_blacklist_from_txt('assets/blacklist1/blacklist_manual.txt')
+    return frozenset(blacklist_auto + blacklist_manual)  #set检索速度比list快很多。2024-08-08
+
+#读取纠错频道名称方法
+def load_corrections_name(filename):
+    corrections = {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip(): #跳过空行
+                continue
+            parts = line.strip().split(',')
+            correct_name = parts[0]
+            for name in parts[1:]:
+                corrections[name] = correct_name
+    return corrections
+
+@functools.lru_cache(maxsize=None)
+def load_corrections():
+    return load_corrections_name('assets/corrections_name.txt')
+
+
+# 分类配置表：(分类, 字典文件, 名称关键字)，顺序即分发优先级；
+# 关键字为None的按频道名是否在字典里匹配，否则按频道名包含该关键字匹配（央视按"CCTV"，字典仅排序用）。
+# 新增分类只需在这里加一行，再在下面输出部分加上对应的段落
+CHANNEL_CATEGORIES = [
+    ("ys", '主频道/CCTV.txt', "CCTV"), #央视频道
+    # ("Olympics_2024_Paris", '主频道/奥运频道.txt', None), #奥运频道 ADD 2024-08-05
+    ("ws", '主频道/卫视频道.txt', None), #卫视频道
+    ("ty", '主频道/体育频道.txt', None), #体育频道
+    ("dy", '主频道/电影.txt', None), #电影频道
+    ("dsj", '主频道/电视剧.txt', None), #电视剧频道
+    ("sh", '主频道/shanghai.txt', None), #上海频道
+    ("gat", '主频道/港澳台.txt', None), #港澳台
+    ("gj", '主频道/国际台.txt', None), #国际台
+    ("jlp", '主频道/纪录片.txt', None), #纪录片
+    ("dhp", '主频道/动画片.txt', None), #动画片
+    ("xq", '主频道/戏曲频道.txt', None), #戏曲
+    ("js", '主频道/解说频道.txt', None), #解说
+    ("cw", '主频道/春晚.txt', None), #春晚
+    ("mx", '主频道/明星.txt', None), #明星
+    ("ztp", '主频道/主题片.txt', None), #主题片
+    ("zy", '主频道/综艺频道.txt', None), #综艺频道
+    ("yy", '主频道/音乐频道.txt', None), #音乐频道
+    ("game", '主频道/游戏频道.txt', None), #游戏频道
+    ("radio", '主频道/收音机频道.txt', None), #收音机频道
+    ("zj", '地方台/浙江频道.txt', None), #地方台-浙江频道
+    ("jsu", '地方台/江苏频道.txt', None), #地方台-江苏频道
+    ("gd", '地方台/广东频道.txt', None), #地方台-广东频道
+    ("hn", '地方台/湖南频道.txt', None), #地方台-湖南频道
+    ("hb", '地方台/湖北频道.txt', None), #地方台-湖北频道
+    ("ah", '地方台/安徽频道.txt', None), #地方台-安徽频道
+    ("hain", '地方台/海南频道.txt', None), #地方台-海南频道
+    ("nm", '地方台/内蒙频道.txt', None), #地方台-内蒙频道
+    ("ln", '地方台/辽宁频道.txt', None), #地方台-辽宁频道
+    ("sx", '地方台/陕西频道.txt', None), #地方台-陕西频道
+    ("shanxi", '地方台/山西频道.txt', None), #地方台-山西频道
+    ("shandong", '地方台/山东频道.txt', None), #地方台-山东频道
+    ("yunnan", '地方台/云南频道.txt', None), #地方台-云南频道
+    ("bj", '地方台/北京频道.txt', None), #地方台-北京频道 ADD【2024-07-30 20:52:53】
+    ("cq", '地方台/重庆频道.txt', None), #地方台-重庆频道 ADD【2024-07-30 20:52:53】
+    ("fj", '地方台/福建频道.txt', None), #地方台-福建频道 ADD【2024-07-30 20:52:53】
+    ("gs", '地方台/甘肃频道.txt', None), #地方台-甘肃频道 ADD【2024-07-30 20:52:53】
+    ("gx", '地方台/广西频道.txt', None), #地方台-广西频道 ADD【2024-07-30 20:52:53】
+    ("gz", '地方台/贵州频道.txt', None), #地方台-贵州频道 ADD【2024-07-30 20:52:53】
+    ("heb", '地方台/河北频道.txt', None), #地方台-河北频道 ADD【2024-07-30 20:52:53】
+    ("hen", '地方台/河南频道.txt', None), #地方台-河南频道 ADD【2024-07-30 20:52:53】
+    ("hlj", '地方台/黑龙江频道.txt', None), #地方台-黑龙江频道 ADD【2024-07-30 20:52:53】
+    ("jl", '地方台/吉林频道.txt', None), #地方台-吉林频道 ADD【2024-07-30 20:52:53】
+    ("nx", '地方台/宁夏频道.txt', None), #地方台-宁夏频道 ADD【2024-07-30 20:52:53】
+    ("jx", '地方台/江西频道.txt', None), #地方台-江西频道 ADD【2024-07-30 20:52:53】
+    ("qh", '地方台/青海频道.txt', None), #地方台-青海频道 ADD【2024-07-30 20:52:53】
+    ("sc", '地方台/四川频道.txt', None), #地方台-四川频道 ADD【2024-07-30 20:52:53】
+    ("tj", '地方台/天津频道.txt', None), #地方台-天津频道 ADD【2024-07-30 20:52:53】
+    ("xj", '地方台/新疆频道.txt', None), #地方台-新疆频道 ADD【2024-07-30 20:52:53】
+    ("zb", '主频道/直播中国.txt', None), #直播中国
+    ("mtv", '主频道/MTV.txt', None), #MTV
+]
+CATEGORY_KEYS = [key for key, _, _ in CHANNEL_CATEGORIES]
+
+@functools.lru_cache(maxsize=None)
+def load_category_dictionaries():
+    return load_dictionaries(CHANNEL_CATEGORIES) #各分类字典：过滤+排序
+
+# 频道名→分类索引（含纠错表里的别名），分发时一次查表
+@functools.lru_cache(maxsize=None)
+def load_category_index():
+    dictionaries = load_category_dictionaries()
+    return CategoryIndex([(key, dictionaries[key], keyword) for key, _, keyword in CHANNEL_CATEGORIES],
+                         load_corrections())
+
+# 解析缓存的输入指纹：只有清理规则变了才需要所有源重新解析，字典、纠错、黑名单的变化由增量构建处理
+@functools.lru_cache(maxsize=None)
+def parse_inputs_fingerprint():
+    return parse_cache.inputs_fingerprint(removal_list)
+
+
+# 准备支持m3u格式
+def get_url_file_extension(url):
+    # 解析URL
+    parsed_url = urlparse(url)
+    # 获取路径部分
+    path = parsed_url.path
+    # 提取文件扩展名
+    extension = os.path.splitext(path)[1]
+    return extension
+
+# 随机获取User-Agent,备用
+def get_random_user_agent():
+    USER_AGENTS = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.93 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.82 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.150 Safari/537.36",
+    ]
+    return random.choice(USER_AGENTS)
+
+# 逐行解析、清理一个源（归类、去重放在主线程按顺序做），返回 [(频道名, 地址), ...]
+def parse_channel_lines(lines):
+    channels = []
+    for line in lines:
+        if  "#genre#" not in line and "," in line and "://" in line:
+            # 拆分成频道名和URL部分
+            channel_name, channel_address = line.split(',', 1)
+            #需要加处理带#号源=予加速源
+            if "#" not in channel_address:
+                channel_lines = [line] # 如果没有井号，则照常按照每行规则进行分发
+            else:
+                # 如果有“#”号，则根据“#”号分隔
+                channel_lines = [f'{channel_name},{channel_url}' for channel_url in channel_address.split('#')]
+            for channel_line in channel_lines:
+                result = normalize_channel_line(channel_line)
+                if result:
+                    channels.append(result)
+    return channels
+
+# 在下载线程里执行：边下载边按行解析、清理，
+# 返回 (缓存key, {'lines': 行数, 'bytes': 字节数, 'channels': [(频道名, 地址), ...]},
+#       {'seconds': 下载解析耗时, 'not_modified': 是否304, 'parse_cache': 是否用了解析缓存})
+def parse_url(url):
+    from iptv.fetch import open_url #并发下载直播源（用到时才import网络相关的模块）
+    from iptv.playlist import PlaylistReader #流式解析直播源
+
+    start = time.perf_counter()
+    is_m3u = get_url_file_extension(url)==".m3u" or get_url_file_extension(url)==".m3u8"  #m3u和m3u8按#EXTINF提取channel_name
+    kind = "m3u" if is_m3u else "txt"
+
+    with open_url(url) as body:
+        # 304时一开始就知道内容hash；200时先读完（边读边算hash），没有ETag/Last-Modified的源内容没变时也能命中
+        chunks = None if body.from_cache else list(body.iter_chunks())
+        cache_key = parse_cache.source_key(body.sha256, parse_inputs_fingerprint(), kind)
+        # 源内容和清理规则都没变，直接用上次解析好的结果
+        cached = parse_cache.load(cache_key)
+        if cached is not None:
+            return cache_key, cached, {'seconds': time.perf_counter() - start, 'not_modified': body.from_cache, 'parse_cache': True}
+
+        # 逐行处理内容
+        reader = PlaylistReader(body.iter_chunks() if chunks is None else iter(chunks), is_m3u)
+        channels = parse_channel_lines(reader)
+
+    parsed = {'lines': reader.line_count, 'bytes': body.size, 'channels': channels}
+    parse_cache.save(cache_key, parsed)
+    return cache_key, parsed, {'seconds': time.perf_counter() - start, 'not_modified': body.from_cache, 'parse_cache': False}
+
+
+# urls-daily.txt里的源，{MMdd}、{MMdd-1}换成今天、昨天的日期
+def load_source_urls(file_name='assets/urls-daily.txt'):
+    source_urls = []
+    for url in read_txt_to_array(file_name):
+        if url.startswith("http"):
+            if "{MMdd}" in url: #特别处理113
+                current_date_str = datetime.now().strftime("%m%d")
+                url=url.replace("{MMdd}", current_date_str)
+
+            if "{MMdd-1}" in url: #特别处理113
+                yesterday_date_str = (datetime.now() - timedelta(days=1)).strftime("%m%d")
+                url=url.replace("{MMdd-1}", yesterday_date_str)
+            source_urls.append(url)
+    return source_urls
+
+# 所有源同时下载解析，按urls-daily.txt的顺序收集，后面依次分发，保证输出结果稳定。
+# 返回 [(源, 源内容标识, [(频道名, 地址, 响应时间), ...])]，下载失败的源内容标识为None
+def fetch_sources(source_urls, report):
+    from iptv.fetch import fetch_all
+
+    parse_inputs_fingerprint() # 在主线程里先算好
+    t2s.load_cache() #上次运行转换过的频道名
+    source_results = []
+    parse_cache_keys = {} # 本次每个源用到的解析缓存，下载失败的源保留上次的，其余的运行结束后删除
+    failed_urls = []
+    for url, parsed, error in fetch_all(source_urls, load=parse_url):
+        print(f"处理URL: {url}")
+        if error is not None:
+            print(f"处理URL时发生错误：{error}")
+            report.source(url)['error'] = str(error)
+            source_results.append((url, None, []))
+            failed_urls.append(url)
+            continue
+        cache_key, result, status = parsed
+        parse_cache_keys[url] = cache_key
+        print(f"行数: {result['lines']}" + ("（解析缓存）" if status['parse_cache'] else ""))
+        report.source(url).update(status, seconds=round(status['seconds'], 3), bytes=result.get('bytes'),
+                                  lines=result['lines'], channels=len(result['channels']))
+        source_results.append((url, cache_key, [(channel_name, channel_address, None) for channel_name, channel_address in result['channels']]))
+
+    parse_cache.prune(parse_cache_keys, failed_urls)
+    t2s.save_cache()
+    return source_results
+
+#读取whitelist,把高响应源从白名单中抽出加入merged_output。返回 (行数, [(频道名, 地址, 响应时间), ...])
+def load_whitelist(file_name='assets/blacklist1/whitelist_auto.txt'):
+    print(f"ADD whitelist_auto.txt")
+    whitelist_auto_lines=read_txt_to_array(file_name) #
+    whitelist_channels = []
+    for whitelist_line in whitelist_auto_lines:
+        if  "#genre#" not in whitelist_line and "," in whitelist_line and "://" in whitelist_line:
+            whitelist_parts = whitelist_line.split(",")
+            try:
+                response_time = float(whitelist_parts[0].replace("ms", ""))
+            except ValueError:
+                print(f"response_time转换失败: {whitelist_line}")
+                response_time = 60000  # 单位毫秒，转换失败给个60秒
+            if response_time < 2000:  #2s以内的高响应源
+                result = normalize_channel_line(",".join(whitelist_parts[1:]))
+                if result:
+                    whitelist_channels.append((*result, response_time))
+    return len(whitelist_auto_lines), whitelist_channels
+
+# 随机取得URL
+def get_random_url(file_path):
+    urls = []
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            # 查找逗号后面的部分，即URL
+            url = line.strip().split(',')[-1]
+            urls.append(url)
+    # 随机返回一个URL
+    return random.choice(urls) if urls else None
+
+# 更新时间、关于本源、每日一首
+def make_header_lines():
+    daily_mtv="每日一首,"+get_random_url('assets/今日推荐.txt')
+
+    # 获取当前的 UTC 时间
+    utc_time = datetime.now(timezone.utc)
+    # 北京时间
+    beijing_time = utc_time + timedelta(hours=8)
+    # 格式化为所需的格式
+    formatted_time = beijing_time.strftime("%Y%m%d %H:%M:%S")
+
+    about_video1="https://d.kstore.dev/download/8880/%E5%85%AC%E5%91%8A.mp4"
+    about_video2="https://vd3.bdstatic.com/mda-pcjhhz2na6nnca3a/sc/bd265_cae_visr_v5/1679330663935082640/mda-pcjhhz2na6nnca3a.mp4"
+    version=formatted_time+","+about_video1
+    about="关于本源(塔利班维护),"+about_video2
+    return [version, about, daily_mtv]
+
+
+# 输出段落：(标题, 内容)，内容为行列表、专区文件，或分类 (分类, 排序, 去重, 纠错)：
+# 排序为"dictionary"按字典顺序、"line"按整行排序；纠错为是否按纠错表改频道名。
+# 每个段落后面空一行，全集版最后一个段落除外；第一段"更新时间"的内容运行时才生成
+ZONE_SECTIONS = [
+    ("🅰️世界光影汇", '专区/♪专享源①.txt'),
+    ("🅱️影网急先锋", '专区/♪专享源②.txt'),
+    ("🌍央视荟萃", '专区/♪优质央视.txt'),
+    ("🛰️卫视精选", '专区/♪优质卫视.txt'),
+    ("🌊港澳台🚢", '专区/♪港澳台.txt'),
+    ("🚀台湾台📶", '专区/♪台湾台.txt'),
+    ("🏠动作片🔴", '专区/♪动作片.txt'),
+    ("😱恐怖片🟡", '专区/♪恐怖片.txt'),
+    ("🪐科幻片🔵", '专区/♪科幻片.txt'),
+    ("💣战争片⚫", '专区/♪战争片.txt'),
+    ("🪁童梦乐园", '专区/♪儿童专享.txt'),
+    ("🏟️咪咕直播", '专区/♪咪咕直播.txt'),
+    ("🏀热血竞技⚽️", '专区/♪sports.txt'),
+    ("🍹私人定制☕️", '专区/♪定制源.txt'),
+    ("✈️英语环球🌍", '专区/♪英语频道.txt'),
+]
+# 瘦身版
+SIMPLE_SECTIONS = ZONE_SECTIONS + [
+    ("☘️湖南频道", ('hn', "dictionary", True, True)),
+    ("☘️湖北频道", ('hb', "dictionary", True, True)),
+    ("☘️广东频道", ('gd', "dictionary", True, True)),
+    ("☘️浙江频道", ('zj', "dictionary", True, True)),
+    ("☘️山东频道", ('shandong', "dictionary", True, True)),
+    ("上海频道", ('sh', "dictionary", True, True)),
+    ("体育频道", ('ty', "dictionary", True, True)),
+]
+# 全集版
+# ("奥运频道", ('Olympics_2024_Paris', "dictionary", True, True)),
+ALL_SECTIONS = ZONE_SECTIONS + [
+    ("🌐央视频道", ('ys', "dictionary", False, True)),
+    ("📡卫视频道", ('ws', "dictionary", False, True)),
+    ("上海频道", ('sh', "dictionary", False, True)),
+    ("体育频道", ('ty', "dictionary", False, True)),
+    ("电影频道", ('dy', "dictionary", False, True)),
+    ("电视剧频道", ('dsj', "dictionary", False, True)),
+    ("明星", ('mx', "dictionary", False, True)),
+    ("主题片", ('ztp', "dictionary", False, True)),
+    ("港澳台", ('gat', "dictionary", False, True)),
+    ("国际台", ('gj', "dictionary", True, True)),
+    ("纪录片", ('jlp', "dictionary", True, True)),
+    ("动画片", ('dhp', "dictionary", True, True)),
+    ("戏曲频道", ('xq', "dictionary", True, True)),
+    ("综艺频道", ('zy', "line", True, True)),
+    ("音乐频道", ('yy', "line", True, False)),
+    ("游戏频道", ('game', "line", True, False)),
+    ("☘️湖南频道", ('hn', "dictionary", True, True)),
+    ("☘️湖北频道", ('hb', "dictionary", True, True)),
+    ("☘️广东频道", ('gd', "dictionary", True, True)),
+    ("☘️浙江频道", ('zj', "dictionary", True, True)),
+    ("☘️山东频道", ('shandong', "dictionary", True, True)),
+    ("☘️江苏频道", ('jsu', "line", True, True)),
+    ("☘️安徽频道", ('ah', "line", True, True)),
+    ("☘️海南频道", ('hain', "line", True, True)),
+    ("☘️内蒙频道", ('nm', "line", True, True)),
+    ("☘️辽宁频道", ('ln', "line", True, True)),
+    ("☘️陕西频道", ('sx', "line", True, True)),
+    ("☘️山西频道", ('shanxi', "line", True, True)),
+    ("☘️云南频道", ('yunnan', "line", True, True)),
+    ("☘️北京频道", ('bj', "line", True, True)),
+    ("☘️重庆频道", ('cq', "line", True, True)),
+    ("☘️福建频道", ('fj', "line", True, True)),
+    ("☘️甘肃频道", ('gs', "line", True, True)),
+    ("☘️广西频道", ('gx', "line", True, True)),
+    ("☘️贵州频道", ('gz', "line", True, True)),
+    ("☘️河北频道", ('heb', "line", True, True)),
+    ("☘️河南频道", ('hen', "line", True, True)),
+    ("☘️黑龙江频道", ('hlj', "line", True, True)),
+    ("☘️吉林频道", ('jl', "line", True, True)),
+    ("☘️江西频道", ('jx', "line", True, True)),
+    ("☘️宁夏频道", ('nx', "line", True, True)),
+    ("☘️青海频道", ('qh', "line", True, True)),
+    ("☘️四川频道", ('sc', "line", True, True)),
+    ("☘️天津频道", ('tj', "line", True, True)),
+    ("☘️新疆频道", ('xj', "line", True, True)),
+    ("解说频道", ('js', "line", True, False)),
+    ("春晚", ('cw', "dictionary", True, False)),
+    ("直播中国", ('zb', "line", True, True)),
+    ("MTV", ('mtv', "line", True, True)),
+    ("收音机频道", ('radio', "dictionary", True, False)),
+    ("❤️与凤行", '专区/特供频道/♪与凤行.txt'),
+    ("❤️以家人之名", '专区/特供频道/♪以家人之名.txt'),
+]
+
+# # custom定制
+# custom_lines_zhang =  ["更新时间,#genre#"] +[version] + ['\n'] +\
+#             ["港澳台,#genre#"] + sort_data(category_dictionaries['gat'],unique(correct_name_data(corrections_name,category_lines['gat']))) + ['\n']
+
+# 分类段落的内容：纠错 → 去重 → 按字典或整行排序
+def category_items(data, key, sort, dedupe, correct):
+    if correct:
+        data = correct_name_data(load_corrections(), data)
+    if dedupe:
+        data = unique(data)
+    if sort == "dictionary":
+        return sort_data(load_category_dictionaries()[key], data)
+    return sorted(data, key=line_key)
+
+# 段落在缓存里的key，同一个分类在瘦身版和全集版里可能排序、去重方式不同
+def section_key(title, content, separator):
+    return "|".join([title, *map(str, content[1:]), str(separator)])
+
+def iter_sections(sections, last_separator=True):
+    for pos, (title, content) in enumerate(sections):
+        yield title, content, pos < len(sections) - 1 or last_separator
+
+# (瘦身版段落, 全集版段落)
+def make_sections(header_lines):
+    header = [("💐更新时间", header_lines)]
+    return header + SIMPLE_SECTIONS, header + ALL_SECTIONS
+
+# 各分类出现在哪些段落里（段落格式变了，分类要重新生成）
+def category_section_keys():
+    keys = {key: [] for key in CATEGORY_KEYS}
+    for sections, last_separator in ((SIMPLE_SECTIONS, True), (ALL_SECTIONS, False)):
+        for title, content, separator in iter_sections(sections, last_separator):
+            if isinstance(content, tuple):
+                keys[content[0]].append(section_key(title, content, separator))
+    return keys
+
+
+################# 增量构建
+class ClassifiedSources(NamedTuple):
+    """按黑名单和字典查出候选分类后的各源，以及每个分类的输入：哪些源有能归入它的频道、
+    命中了哪些黑名单条目、分发时排在它前面的分类（url重复时会落到后面的分类）。"""
+
+    dispatch_queue: list     # [(源, 源内容标识, [(候选分类, 频道名, 地址, 响应时间), ...])]
+    whitelist_id: str
+    whitelist_routes: list
+    category_sources: dict
+    category_blacklist: dict
+    category_upstream: dict
+    blacklist_hits: set
+
+def classify_sources(source_results, whitelist_lines, whitelist_channels, report):
+    category_index = load_category_index()
+    combined_blacklist = load_blacklist()
+    category_sources = {key: [] for key in CATEGORY_KEYS}
+    category_blacklist = {key: set() for key in CATEGORY_KEYS}
+    category_upstream = {key: set() for key in CATEGORY_KEYS}
+    blacklist_hits = set()
+    candidate_tuples = set()
+
+    def classify_channels(channels):
+        routes = []
+        source_tuples = set()
+        for channel_name, channel_address, latency in channels:
+            # 根据频道名称查出所有匹配的分类，顺序即分发优先级
+            categories = category_index.lookup(channel_name)
+            if channel_address in combined_blacklist: # 判断当前源是否在blacklist中
+                blacklist_hits.add(channel_address)
+                for key in categories:
+                    category_blacklist[key].add(channel_address)
+                continue
+            source_tuples.add(categories)
+            routes.append((categories, channel_name, channel_address, latency))
+        candidate_tuples.update(source_tuples)
+        return routes, set().union(*source_tuples)
+
+    # whitelist当作最后一个源
+    whitelist_id = digest(whitelist_channels)
+    report.source('whitelist_auto.txt').update(lines=whitelist_lines, channels=len(whitelist_channels))
+    dispatch_queue = []
+    for source, source_id, channels in source_results + [('whitelist_auto.txt', whitelist_id, whitelist_channels)]:
+        routes, touched = classify_channels(channels)
+        report.source(source)['blacklisted'] = len(channels) - len(routes)
+        for key in touched:
+            category_sources[key].append((source, source_id))
+        dispatch_queue.append((source, source_id, routes))
+    whitelist_routes = dispatch_queue.pop()[2]
+
+    for categories in candidate_tuples:
+        for pos, key in enumerate(categories):
+            category_upstream[key].update(categories[:pos])
+
+    return ClassifiedSources(dispatch_queue, whitelist_id, whitelist_routes, category_sources,
+                             category_blacklist, category_upstream, blacklist_hits)
+
+# 段落里用到的纠错和logo条目：只取这个分类里的频道名相关的
+def name_lookups(names, logos):
+    corrections_name = load_corrections()
+    corrected = {name: corrections_name[name] for name in names if name in corrections_name}
+    return {
+        'corrections': corrected,
+        'logos': {name: logos.get(name) for name in set(names) | set(corrected.values())},
+    }
+
+# 每个分类一个节点：决定分发结果的输入会影响后面的分类；字典（排序）、段落格式、纠错、logo只影响本分类。
+# 纠错和logo按上次这个分类里的频道名取（其他输入都没变时，频道名也和上次一样），
+# 重新生成的分类保存时按本次的频道名重新记录。返回 (要重新生成的分类, others是否要重新生成)
+def plan_build(build_graph, classified, logos):
+    category_dictionaries = load_category_dictionaries()
+    category_index = load_category_index()
+    section_keys = category_section_keys()
+    index_routes = {name: category_index.lookup(name) for name in category_index.index}
+    for key, _, keyword in CHANNEL_CATEGORIES:
+        build_graph.add(key, {
+            'keyword': keyword,
+            'routes': {name: categories for name, categories in index_routes.items() if key in categories},
+            'sources': classified.category_sources[key],
+            'blacklist': classified.category_blacklist[key],
+        }, deps=classified.category_upstream[key], local_inputs={
+            'dictionary': category_dictionaries[key],
+            'sections': section_keys[key],
+            **name_lookups(build_graph.previous(key).get('names', []), logos),
+        })
+    rebuild_others = build_graph.add('others', {
+        'routes': index_routes,
+        'sources': [(source, source_id) for source, source_id, _ in classified.dispatch_queue] + [classified.whitelist_id],
+        'blacklist': classified.blacklist_hits,
+    })
+    rebuild_keys = {key for key in CATEGORY_KEYS if build_graph.is_dirty(key)}
+    print(f"增量构建：{len(rebuild_keys)}/{len(CATEGORY_KEYS)} 个分类需要重新生成" + ("，others重新生成" if rebuild_others else ""))
+    for key in CATEGORY_KEYS:
+        if key in rebuild_keys:
+            print(f"  {key}: {', '.join(build_graph.changed_inputs(key)) or '前面的分类有变化'}")
+    return rebuild_keys, rebuild_others
+
+# 按urls-daily.txt的顺序依次分发，最后是whitelist；统计每个源归入分类、归入other、url重复丢弃的条数，
+# 返回各分类本次分发进来的条数（包括不用重新生成的分类）
+def dispatch_sources(dispatcher, classified, report):
+    other_lines = dispatcher.other_lines
+    category_records = dict.fromkeys(CATEGORY_KEYS, 0)
+
+    def dispatch_routes(source, routes):
+        counts = {}
+        for categories, channel_name, channel_address, latency in routes:
+            outcome = dispatcher.dispatch(categories, channel_name, channel_address, source, latency)
+            counts[outcome] = counts.get(outcome, 0) + 1
+        others = counts.pop(OTHERS, 0)
+        duplicate = counts.pop(None, 0)
+        for key, count in counts.items():
+            category_records[key] += count
+        report.source(source).update(accepted=sum(counts.values()), others=others, duplicate=duplicate)
+
+    for source, source_id, routes in classified.dispatch_queue:
+        if dispatcher.rebuild_others:
+            other_lines.append("◆◆◆　"+source)  # 存入other_lines便于check 2024-08-02 10:41
+        dispatch_routes(source, routes)
+        if dispatcher.rebuild_others and source_id is not None:
+            other_lines.append('\n') #每个url处理完成后，在other_lines加个回车 2024-08-02 10:46
+    dispatch_routes('whitelist_auto.txt', classified.whitelist_routes)
+    return category_records
+
+
+class SectionRenderer:
+    """生成输出段落：render() 返回 (txt文本, m3u文本（不含文件头）, 行数)，输入没变的分类直接用上次生成的。"""
+
+    def __init__(self, dispatcher, build_graph, logos):
+        self.category_lines = dispatcher.category_lines
+        self.rebuild_keys = dispatcher.rebuild_keys
+        self.build_graph = build_graph
+        self.logos = logos
+        self.rendered = {key: {} for key in self.rebuild_keys}   # 重新生成的分类 → {段落key: 段落}
+        self.seconds = dict.fromkeys(self.category_lines, 0.0)   # 各分类的组装耗时
+
+    def render(self, title, content, separator):
+        start = time.perf_counter()
+        if isinstance(content, tuple):
+            key = content[0]
+            if key not in self.rebuild_keys:
+                return self.build_graph.output(key)['sections'][section_key(title, content, separator)]
+            lines = category_items(self.category_lines[key], *content)
+        elif isinstance(content, str):
+            lines = read_txt_to_array(content)
+        else:
+            lines = content
+        items = [f"{title},#genre#"] + lines + (['\n'] if separator else [])
+        rendered = (render_txt(items), ''.join(render_m3u_entries(items, self.logos, load_corrections())), len(items))
+        if isinstance(content, tuple):
+            self.rendered[key][section_key(title, content, separator)] = rendered
+            self.seconds[key] += time.perf_counter() - start
+        return rendered
+
+    def render_all(self, sections, last_separator=True):
+        return [self.render(*section) for section in iter_sections(sections, last_separator)]
+
+
+# 直接用各段落生成好的m3u拼接，生成一次发布到两个文件
+def make_m3u(sections, m3u_file, m3u_file_copy):
+    try:
+        publish(M3U_HEADER + ''.join(m3u_text for _, m3u_text, _ in sections), [m3u_file, m3u_file_copy])
+
+        print(f"M3U文件 '{m3u_file}' 生成成功。")
+        print(f"M3U文件 '{m3u_file_copy}' 生成成功。")
+    except Exception as e:
+        print(f"发生错误: {e}")
+
+
+# 将合并后的文本写入文件
+output_file = "merged_output.txt"
+output_file_simple = "merged_output_simple.txt"
+others_file = "others_output.txt"
+
+# NEW将合并后的文本写入文件
+new_output_file = "live.txt"
+new_output_file_simple = "live_lite.txt"
+
+# # custom定制
+# output_file_custom_zhang = "custom/zhang.txt"
+
+
+def main():
+    # 执行开始时间
+    timestart = datetime.now()
+    report = RunReport() # 各阶段、各源、各分类的耗时和计数，最后写到run_report.json
+
+    combined_blacklist = load_blacklist()
+    load_category_index()
+    logos = load_logo_index('assets/logo.txt') #读入logo库，频道名→logo地址
+    report.lap('load')
+
+    # 处理
+    source_results = fetch_sources(load_source_urls(), report)
+    report.lap('fetch')
+
+    whitelist_lines, whitelist_channels = load_whitelist()
+    sections_simple, sections_all = make_sections(make_header_lines())
+    classified = classify_sources(source_results, whitelist_lines, whitelist_channels, report)
+    build_graph = BuildGraph()
+    rebuild_keys, rebuild_others = plan_build(build_graph, classified, logos)
+    report.lap('classify')
+
+    # 定义多个对象用于存储不同内容的行文本：各分类的行（category_lines）和归入other的行
+    dispatcher = Dispatcher(CATEGORY_KEYS)
+    dispatcher.rebuild_keys = rebuild_keys
+    dispatcher.rebuild_others = rebuild_others
+    category_records = dispatch_sources(dispatcher, classified, report)
+    report.lap('dispatch')
+
+    renderer = SectionRenderer(dispatcher, build_graph, logos)
+    all_sections_simple = renderer.render_all(sections_simple)
+    all_sections = renderer.render_all(sections_all, last_separator=False)
+    for key in rebuild_keys:
+        names = sorted({channel.name for channel in dispatcher.category_lines[key]})
+        build_graph.set_output(key, {'names': names, 'sections': renderer.rendered[key]}, name_lookups(names, logos))
+    if rebuild_others:
+        other_lines = dispatcher.other_lines
+        build_graph.set_output('others', {'text': render_txt(other_lines), 'lines': len(other_lines)})
+    others_output = build_graph.output('others')
+    for key in CATEGORY_KEYS:
+        report.category(key).update(records=category_records[key], rebuilt=key in rebuild_keys,
+                                    assemble_seconds=round(renderer.seconds[key], 4))
+    report.lap('assemble')
+
+    # 每个产物只生成一次，内容相同的文件一起发布（临时文件+os.replace，相同内容用硬链接）
+    try:
+        # 瘦身版
+        publish(''.join(text for text, _, _ in all_sections_simple), [output_file_simple, new_output_file_simple])
+        print(f"合并后的文本已保存到文件: {output_file_simple}")
+        print(f"合并后的文本已保存到文件: {new_output_file_simple}")
+
+        # 全集版
+        publish(''.join(text for text, _, _ in all_sections), [output_file, new_output_file])
+        print(f"合并后的文本已保存到文件: {output_file}")
+        print(f"合并后的文本已保存到文件: {new_output_file}")
+
+        # 其他
+        publish(others_output['text'], [others_file])
+        print(f"Others已保存到文件: {others_file}")
+
+        # 定制
+        # with open(output_file_custom_zhang, 'w', encoding='utf-8') as f:
+        #     for line in custom_lines_zhang:
+        #         f.write(line + '\n')
+        # print(f"合并后的文本已保存到文件: {output_file_custom_zhang}")
+
+    except Exception as e:
+        print(f"保存文件时发生错误：{e}")
+
+    ################# 添加生成m3u文件
+    make_m3u(all_sections, "merged_output.m3u", "live.m3u")
+    make_m3u(all_sections_simple, "merged_output_simple.m3u", "live_lite.m3u")
+
+    build_graph.save() #本次重新生成的分类存起来，下次输入没变就直接用
+    report.lap('write')
+
+    # 执行结束时间
+    timeend = datetime.now()
+
+    # 计算时间差
+    elapsed_time = timeend - timestart
+    total_seconds = elapsed_time.total_seconds()
+
+    # 转换为分钟和秒
+    minutes = int(total_seconds // 60)
+    seconds = int(total_seconds % 60)
+    # 格式化开始和结束时间
+    timestart_str = timestart.strftime("%Y%m%d_%H_%M_%S")
+    timeend_str = timeend.strftime("%Y%m%d_%H_%M_%S")
+
+    print(f"开始时间: {timestart_str}")
+    print(f"结束时间: {timeend_str}")
+    print(f"执行时间: {minutes} 分 {seconds} 秒")
+
+    combined_blacklist_hj = len(combined_blacklist)
+    all_lines_hj = sum(count for _, _, count in all_sections)
+    other_lines_hj = others_output['lines']
+    print(f"blacklist行数: {combined_blacklist_hj} ")
+    print(f"merged_output.txt行数: {all_lines_hj} ")
+    print(f"others_output.txt行数: {other_lines_hj} ")
+
+    report.save(blacklist=combined_blacklist_hj, merged_output_lines=all_lines_hj, others_lines=other_lines_hj,
+                rebuilt_categories=len(rebuild_keys), rebuilt_others=rebuild_others)
+
+
+#备用1：http://tonkiang.us
+#备用2：https://www.zoomeye.hk,https://www.shodan.io,https://tv.cctv.com/live/
+#备用3：(BlackList检测对象)http,rtmp,p3p,rtp（rtsp，p2p）
@@ -0,0 +1,70 @@
+import re
+
+# 流式解析直播源：直接在下载到的bytes块上按行切分，只对有用的行解码，
+# 一边下载一边交出 "频道名,URL" 行，不再整体 read()+decode()+split()
+
+# 处理后缀名为m3u，但是内容为txt的文件：xxxx,http://xxxxx.xx.xx
+TXT_LINE_PATTERN = re.compile(r'^[^,]+,[^\s]+://[^\s]+$')
+
+URL_PREFIXES = (b"http", b"rtmp", b"p3p")
+
+
+# 把bytes块拼成行（不含\n），和 text.split('\n') 的切分结果一致
+def iter_raw_lines(chunks):
+    rest = b''
+    for chunk in chunks:
+        if rest:
+            chunk = rest + chunk
+        lines = chunk.split(b'\n')
+        rest = lines.pop()
+        yield from lines
+    yield rest
+
+
+def _is_channel_line(raw):
+    return b"#genre#" not in raw and b"," in raw and b"://" in raw
+
+
+class PlaylistReader:
+    """逐行交出源里的 "频道名,URL" 行；m3u 格式按 #EXTINF 的频道名拼成同样的行。
+
+    line_count 为读到的原始行数。只解码候选行（"频道名,URL" 行和 #EXTINF 的频道名），其余行里的非法
+    UTF-8 不再影响结果；候选行解码失败时抛出 UnicodeDecodeError，整个源作废。
+    """
+
+    def __init__(self, chunks, is_m3u=False):
+        self.chunks = chunks
+        self.is_m3u = is_m3u
+        self.line_count = 0
+
+    def __iter__(self):
+        if self.is_m3u:
+            return self._iter_m3u()
+        return self._iter_txt()
+
+    def _iter_txt(self):
+        for raw in iter_raw_lines(self.chunks):
+            self.line_count += 1
+            if _is_channel_line(raw):
+                yield raw.decode('utf-8')
+
+    def _iter_m3u(self):
+        channel_name = ""
+        for raw in iter_raw_lines(self.chunks):
+            self.line_count += 1
+            # 过滤掉 #EXTM3U 开头的行
+            if raw.startswith(b"#EXTM3U"):
+                continue
+            # #EXTINF 行只解码最后一个逗号后的频道名
+            if raw.startswith(b"#EXTINF"):
+                channel_name = raw.rsplit(b',', 1)[-1].decode('utf-8').strip()
+            elif raw.startswith(URL_PREFIXES):
+                line = raw.decode('utf-8')
+                yield f"{channel_name},{line.strip()}"
+            # 其余行（包括 #EXTINF 行本身）符合 "频道名,URL" 格式的也照收
+            if _is_channel_line(raw):
+                line = raw.decode('utf-8')
+            else:
+                continue
+            if "#genre#" not in line and "," in line and "://" in line and TXT_LINE_PATTERN.match(line):
+                yield line
@@ -0,0 +1,557 @@
+import asyncio
+import ipaddress
+import os
+import re
+import socket
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from iptv.util import clean_url
+
+# 直播源检测引擎：asyncio + 原始socket流，同时检测上千个url；
+# 全局并发受文件描述符上限约束，同一个host另有并发上限，避免把一个服务器打挂或被封。
+# http只带Range读开头几KB，按内容判断是不是真的视频流（TS/FLV/m3u8等），读完立即断开，
+# 直播流不会一直占着连接和带宽，返回200的网页（运营商劫持、错误页）也不会被当成可用
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# 同时检测的url个数、同一个host（host:端口）同时检测的个数，可以用环境变量调整
+CONCURRENCY = int(os.environ.get('IPTV_PROBE_CONCURRENCY', 1000))
+MAX_PER_HOST = int(os.environ.get('IPTV_PROBE_PER_HOST', 16))
+TIMEOUT = 6           # 连接、等响应头各自的超时（秒），和原来urlopen的timeout一样按每一步算
+MAX_REDIRECTS = 10    # 和urllib一样最多跟随10次跳转
+MAX_HEADER_BYTES = 64 * 1024
+SNIFF_BYTES = 2048    # 判断内容类型读的字节数（TS至少要两个188字节的包）
+MAX_FETCH_BYTES = 1024 * 1024  # fetch_http最多读的字节数（m3u8清单等）
+MAX_DRAIN_BYTES = 64 * 1024  # 剩下的响应体不超过这么多时读完，连接留着复用
+THREADS = 64          # 域名解析（getaddrinfo）和非http检测用的线程数
+FD_RESERVE = 256      # 留给日志、线程里的socket、ffprobe管道等的文件描述符
+RESOLVE_TIMEOUT = 10  # 单个域名解析的超时（秒）
+BREAKER_THRESHOLD = 3 # 同一个host连续连不上这么多次就熔断
+BREAKER_SAMPLE = 20   # 熔断后每这么多个url抽一个真正检测，连上了就恢复
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'rtmp': 1935, 'rtsp': 554}
+# 统计、防缓存用的参数，去掉后还是同一个源
+TRACKING_PARAMS = {'spm', 'from', 'share_from', '_'}
+
+# http.client不允许url里有空白和控制字符
+_INVALID_TARGET = re.compile('[\x00-\x20\x7f]')
+
+
+class ProbeError(Exception):
+    pass
+
+# 连不上（域名解析失败、拒绝连接、连接超时），熔断只按这个计数；
+# 连上以后的错误（TLS握手失败、被重置、等响应头超时）说明host还在，不算
+class ConnectError(ProbeError):
+    pass
+
+
+# 一个url的检测结果：elapsed为响应时间（毫秒），检测过程出错时为None，error为出错原因；
+# probed为False时没有真正检测（域名不存在、host被熔断），按失败处理但不能当成这个url自己的检测结果
+class ProbeResult(NamedTuple):
+    url: str
+    ok: bool
+    elapsed: float
+    error: str
+    probed: bool = True
+
+
+# check在线程池、ffprobe池里执行时返回这个代替是否可用：elapsed为在worker里量的响应时间（毫秒），
+# 排队等worker的时间不算（原来每个检测都在自己的线程里计时）
+class Timed(NamedTuple):
+    ok: bool
+    elapsed: float
+
+
+# 当前进程可用的文件描述符个数（尽量把软上限提到硬上限），拿不到上限（如Windows）时返回None
+def fd_budget(wanted=CONCURRENCY + FD_RESERVE):
+    try:
+        import resource
+    except ImportError:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    if soft == resource.RLIM_INFINITY:
+        return None
+    return soft
+
+
+################# 内容判断
+TS_PACKET = 188
+
+def _is_ts(data):
+    # 开头可能有残缺的包：找一个0x47，且下一个包的开头也是0x47
+    for pos in range(min(TS_PACKET, len(data) - TS_PACKET)):
+        if data[pos] == 0x47 and data[pos + TS_PACKET] == 0x47:
+            return True
+    return len(data) <= TS_PACKET and data[0] == 0x47
+
+# 文本（网页、json，包括GBK编码的）里没有控制字符，视频数据里很多
+_CONTROL_BYTES = bytes(range(0, 9)) + bytes(range(14, 32))
+
+def _is_text(data):
+    return len(data.translate(None, _CONTROL_BYTES)) == len(data)
+
+# 按开头的字节判断内容类型：'m3u8'、'flv'、'ts'、'mp4'、'audio'，不认识的二进制内容为'binary'，
+# 空内容和网页、json之类的文本返回None
+def sniff_media(data):
+    if not data:
+        return None
+    text = data.lstrip(b'\xef\xbb\xbf \t\r\n')
+    if text.startswith(b'#EXTM3U'):
+        return 'm3u8'
+    if data.startswith(b'FLV'):
+        return 'flv'
+    if _is_text(data):
+        return None
+    if _is_ts(data):
+        return 'ts'
+    if data[4:8] in (b'ftyp', b'moof', b'styp'):
+        return 'mp4'
+    if data.startswith(b'ID3') or (data[0] == 0xFF and len(data) > 1 and data[1] & 0xF0 == 0xF0):
+        return 'audio'
+    return 'binary'
+
+
+################# url规范化
+# 同一个源的不同写法归成一个url，只检测一次：协议和host转小写、去掉默认端口、去掉$后缀和#后面的部分、
+# 去掉utm_*等统计参数；url格式不对的原样返回。
+# 只用作去重的key，不要拿去检测：签名、中转地址可能离不开被去掉的参数
+def canonical_url(url):
+    url = clean_url(url.strip()).split('#', 1)[0]
+    try:
+        parts = urlsplit(url)
+        host = _host_port(parts)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.rpartition('@')[0] + '@' + host if '@' in parts.netloc else host
+    path = parts.path or ('/' if scheme in ('http', 'https') else '')
+    query = '&'.join(param for param in parts.query.split('&') if param and not _is_tracking(param))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+# 域名（小写，IPv6加方括号）加上不是默认值的端口，不含user:pass@；端口格式不对时抛ValueError
+def _host_port(parts):
+    host = parts.hostname or ''
+    if ':' in host:
+        host = f'[{host}]'
+    port = parts.port
+    if port is not None and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host += f':{port}'
+    return host
+
+def _is_tracking(param):
+    name = param.split('=', 1)[0].lower()
+    return name in TRACKING_PARAMS or name.startswith('utm_')
+
+
+################# 域名解析
+# 检测前把所有域名并发解析一遍，同一个域名只解析一次：host → [ip, ...]，域名不存在（NXDOMAIN）的为None。
+# 暂时解析不了（超时、DNS服务器出错）的不记，检测时再解析
+_dns_cache = {}
+
+# 域名不存在时getaddrinfo报的错误码
+_NXDOMAIN_ERRORS = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+async def resolve_hosts(hosts, concurrency=THREADS):
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def resolve(host):
+        async with sem:
+            try:
+                infos = await asyncio.wait_for(loop.getaddrinfo(host, None, type=socket.SOCK_STREAM), RESOLVE_TIMEOUT)
+            except socket.gaierror as e:
+                if e.errno in _NXDOMAIN_ERRORS:
+                    _dns_cache[host] = None
+                return
+            except (OSError, asyncio.TimeoutError):
+                return
+            addresses = dict.fromkeys(info[4][0] for info in infos)
+            _dns_cache[host] = sorted(addresses, key=lambda ip: ':' in ip) # IPv4优先
+
+    await asyncio.gather(*(resolve(host) for host in set(hosts)
+                           if host and host not in _dns_cache and not _is_ip(host)))
+
+# 域名不存在（已确认NXDOMAIN）
+def is_unresolvable(host):
+    return host in _dns_cache and _dns_cache[host] is None
+
+# 解析好的第一个ip，没有解析过的原样返回；给在线程里用socket检测的rtp、p3p等用
+def cached_address(host):
+    return (_dns_cache.get(host) or [host])[0]
+
+# 按解析好的ip依次连接（https仍按域名校验证书），没有解析过的直接按域名连接
+async def _open_connection(host, port, tls):
+    addresses = _dns_cache.get(host) or [host]
+    for pos, address in enumerate(addresses):
+        try:
+            return await asyncio.open_connection(address, port, ssl=tls, server_hostname=host if tls else None,
+                                                 limit=MAX_HEADER_BYTES)
+        except OSError:
+            if pos == len(addresses) - 1:
+                raise
+
+
+################# http检测
+_ssl_context = None
+
+def _get_ssl_context():
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+# 空闲的keep-alive连接，按 (协议, host, 端口) 存，同一个host的下一个url直接复用
+_idle_connections = {}
+
+async def _connect(key, timeout):
+    idle = _idle_connections.get(key)
+    while idle:
+        reader, writer = idle.pop()
+        if not writer.is_closing() and not reader.at_eof():
+            return reader, writer, True
+        writer.transport.abort()
+    scheme, host, port = key
+    tls = _get_ssl_context() if scheme == 'https' else None
+    try:
+        reader, writer = await asyncio.wait_for(_open_connection(host, port, tls), timeout)
+    except (ssl.SSLError, ConnectionResetError, ConnectionAbortedError) as e:  # 已经连上了
+        raise ProbeError(str(e) or type(e).__name__) from e
+    except (OSError, asyncio.TimeoutError) as e:
+        raise ConnectError(str(e) or type(e).__name__) from e
+    return reader, writer, False
+
+# 关闭所有空闲连接（事件循环结束前调用）
+def close_idle_connections():
+    for idle in _idle_connections.values():
+        for _, writer in idle:
+            writer.transport.abort()
+    _idle_connections.clear()
+
+
+class _Response:
+    """响应头已读完的一个响应：release() 把连接放回空闲池（剩下的响应体不多时先读完），abort() 直接断开。"""
+
+    def __init__(self, key, status, headers, keep_alive, reader, writer):
+        self.key = key
+        self.status = status
+        self.headers = headers
+        self.keep_alive = keep_alive
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    async def release(self, consumed, timeout):
+        length = '0' if self.status in (204, 304) else self.headers.get('content-length')
+        if self.keep_alive and length is not None and length.isdigit() and int(length) - consumed <= MAX_DRAIN_BYTES:
+            try:
+                await asyncio.wait_for(self.reader.readexactly(int(length) - consumed), timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                self.abort()
+                return
+            self.closed = True
+            _idle_connections.setdefault(self.key, []).append((self.reader, self.writer))
+        else:
+            self.abort()
+
+    def abort(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.transport.abort()
+
+# 发一个GET，读到响应头为止，返回_Response
+async def _http_open(url, timeout, extra_headers=''):
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ProbeError(f"不支持的url: {url}")
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    if _INVALID_TARGET.search(target):
+        raise ProbeError(f"url里有非法字符: {url!r}")
+    key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+    # Host头不能带url里的user:pass@（urlopen也是去掉的）
+    request = (f"GET {target} HTTP/1.1\r\nHost: {_host_port(parts)}\r\nUser-Agent: {USER_AGENT}\r\n"
+               f"Accept-Encoding: identity\r\n{extra_headers}Connection: keep-alive\r\n\r\n").encode('ascii')
+
+    # 复用的连接可能已被服务端关闭，这种情况换新连接重试一次
+    while True:
+        reader, writer, reused = await _connect(key, timeout)
+        try:
+            writer.write(request)
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            writer.transport.abort()
+            if reused and not isinstance(e, asyncio.TimeoutError):
+                continue
+            raise ProbeError(str(e) or type(e).__name__) from e
+        except BaseException:
+            writer.transport.abort()
+            raise
+        break
+
+    lines = head.decode('iso-8859-1').split('\r\n')
+    version, _, rest = lines[0].partition(' ')
+    try:
+        if not version.startswith('HTTP/'):
+            raise ValueError
+        status = int(rest[:3])
+    except ValueError:
+        writer.transport.abort()
+        raise ProbeError(f"无效的响应: {lines[0][:80]!r}") from None
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+    return _Response(key, status, headers, keep_alive, reader, writer)
+
+# 开头已经能确定是FLV或m3u8，不用等够SNIFF_BYTES
+def _sniff_done(data):
+    return data.startswith(b'FLV') or data.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'#EXTM3U')
+
+# 把响应体开头最多limit个字节读进data（bytearray，超时时调用方可以用已经读到的部分；支持chunked），
+# 直播流读够了就返回，不等它结束；done(data)为真时提前返回，为None时读到limit或响应体结束
+async def _read_prefix(reader, headers, limit, data, done=_sniff_done):
+    if done is None:
+        done = lambda data: False
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        while len(data) < limit and not done(data):
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b';')[0].strip(), 16)
+            except ValueError:
+                break
+            if size == 0:
+                break
+            take = min(size, limit - len(data))
+            data += await reader.readexactly(take)
+            if take < size:
+                break
+            await reader.readline() # 块后面的\r\n
+        return
+    length = headers.get('content-length')
+    if length is not None and length.isdigit():
+        limit = min(limit, int(length))
+    while len(data) < limit and not done(data):
+        chunk = await reader.read(limit - len(data))
+        if not chunk:
+            break
+        data += chunk
+
+# 和urlopen一样跟随跳转，4xx/5xx和其他3xx算出错，返回最终的 (url, _Response)；
+# 带Range时服务器不支持（416）就不带Range再请求一次
+async def _open_final(url, timeout, range_header=''):
+    redirects = 0
+    while True:
+        response = await _http_open(url, timeout, range_header)
+        try:
+            status, headers = response.status, response.headers
+            if status == 416 and range_header:
+                range_header = ''
+                await response.release(0, timeout)
+                continue
+            if status in REDIRECT_CODES and 'location' in headers:
+                await response.release(0, timeout)
+                redirects += 1
+                if redirects > MAX_REDIRECTS:
+                    raise ProbeError("跳转次数过多")
+                url = urljoin(url, headers['location'])
+                continue
+            if status >= 300:
+                await response.release(0, timeout)
+                raise ProbeError(f"HTTP Error {status}")
+            return url, response
+        except BaseException:
+            response.abort()
+            raise
+
+# 读完的响应（如完整的206、错误页）连接留着复用，没读完的（直播流、chunked）直接断开
+async def _finish(response, consumed, timeout):
+    if 'chunked' in response.headers.get('transfer-encoding', '').lower():
+        response.abort()
+    else:
+        await response.release(consumed, timeout)
+
+# 最终为200（或Range的206）时读开头SNIFF_BYTES字节判断内容，返回内容类型（见sniff_media），不是视频流时返回None
+async def check_http(url, timeout=TIMEOUT):
+    url, response = await _open_final(url, timeout, f"Range: bytes=0-{SNIFF_BYTES - 1}\r\n")
+    try:
+        if response.status not in (200, 206):
+            await response.release(0, timeout)
+            return None
+        data = bytearray()
+        try:
+            await asyncio.wait_for(_read_prefix(response.reader, response.headers, SNIFF_BYTES, data), timeout)
+        except asyncio.TimeoutError:
+            if not data: # 响应头之后一直没有数据
+                raise
+        await _finish(response, len(data), timeout)
+        return sniff_media(bytes(data))
+    finally:
+        response.abort()
+
+# 下载一个不大的响应体（m3u8清单等），超过limit的部分不读，返回 (跳转后最终的url, 内容)
+async def fetch_http(url, timeout=TIMEOUT, limit=MAX_FETCH_BYTES):
+    url, response = await _open_final(url, timeout)
+    try:
+        data = bytearray()
+        await asyncio.wait_for(_read_prefix(response.reader, response.headers, limit, data, done=None), timeout)
+        await _finish(response, len(data), timeout)
+        return url, bytes(data)
+    finally:
+        response.abort()
+
+# 读直播流开头最多limit个字节（解析视频头用），done(data)为真时提前结束；直播流读到超时也不算出错，返回已经读到的部分
+async def read_stream(url, timeout=TIMEOUT, limit=MAX_FETCH_BYTES, done=None):
+    url, response = await _open_final(url, timeout)
+    try:
+        data = bytearray()
+        try:
+            await asyncio.wait_for(_read_prefix(response.reader, response.headers, limit, data, done), timeout)
+        except asyncio.TimeoutError:
+            if not data:
+                raise
+        await _finish(response, len(data), timeout)
+        return bytes(data)
+    finally:
+        response.abort()
+
+
+################# 调度
+def _run_timed(func, args):
+    start = time.perf_counter()
+    ok = func(*args)
+    return Timed(ok, (time.perf_counter() - start) * 1000)
+
+# 在线程里执行阻塞的检测（rtp、p3p等），返回Timed，计时从线程开始执行算起
+async def to_thread_timed(func, *args):
+    return await asyncio.to_thread(_run_timed, func, args)
+
+# (host:端口, 域名)，url格式不对时为空
+def _split_host(url):
+    try:
+        parts = urlsplit(url)
+        return parts.netloc, parts.hostname
+    except ValueError:
+        return '', None
+
+class CircuitBreaker:
+    """按host熔断：连续threshold次连不上（ConnectError）后，这个host剩下的url不再检测直接算失败，
+    每sample个抽一个真正检测，连上了（不管检测结果）就恢复。"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, sample=BREAKER_SAMPLE):
+        self.threshold = threshold
+        self.sample = sample
+        self.failures = {}  # host → 连续连不上的次数
+        self.skipped = {}   # host → 熔断后来的url个数（含抽检的）
+
+    def allow(self, host):
+        if self.failures.get(host, 0) < self.threshold:
+            return True
+        skipped = self.skipped.get(host, 0) + 1
+        self.skipped[host] = skipped
+        return skipped % self.sample == 0
+
+    def record(self, host, connect_failed):
+        if connect_failed:
+            self.failures[host] = self.failures.get(host, 0) + 1
+        else:
+            self.failures.pop(host, None)
+
+    def is_open(self, host):
+        return self.failures.get(host, 0) >= self.threshold
+
+
+class ProbeEngine:
+    """在一个事件循环里检测所有url：check(url, timeout) 是检测单个url的协程，返回是否可用，出错时抛异常。
+
+    每个url先占host的名额再占全局名额，排队等同一个host的url不占用全局并发；
+    响应时间从拿到名额开始算，不包括排队时间；check返回Timed时用它在worker里量的时间。连不上的host由CircuitBreaker熔断，剩下的url不用再等超时。
+    检测前先并发解析所有域名，域名不存在的url直接算失败，不占名额。
+    """
+
+    def __init__(self, check, concurrency=CONCURRENCY, per_host=MAX_PER_HOST, timeout=TIMEOUT, threads=THREADS,
+                 breaker=None):
+        budget = fd_budget(concurrency + FD_RESERVE)
+        if budget is not None:
+            concurrency = max(1, min(concurrency, budget - FD_RESERVE))
+        self.check = check
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.threads = threads
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.hosts = 0         # 解析的域名个数
+        self.unresolvable = 0  # 其中不存在的个数
+
+    async def _probe(self, url, timeout, slots, host_slots):
+        host, hostname = _split_host(url)
+        if is_unresolvable(hostname):
+            return ProbeResult(url, False, None, f"域名解析失败: {hostname}", False)
+        sem = host_slots.get(host)
+        if sem is None:
+            sem = host_slots[host] = asyncio.Semaphore(self.per_host)
+        async with sem:
+            if not self.breaker.allow(host):
+                return ProbeResult(url, False, None, f"{host}连续连接失败，跳过检测", False)
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    ok = await self.check(url, timeout)
+                except Exception as e:
+                    self.breaker.record(host, isinstance(e, ConnectError))
+                    return ProbeResult(url, False, None, str(e) or type(e).__name__)
+                elapsed = (time.perf_counter() - start) * 1000
+                if isinstance(ok, Timed):
+                    ok, elapsed = ok
+                self.breaker.record(host, False)
+                return ProbeResult(url, bool(ok), elapsed, None)
+
+    async def _run(self, urls, on_result, timeouts):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.threads))
+        hostnames = {_split_host(url)[1] for url in urls}
+        await resolve_hosts(hostnames, self.threads)
+        self.hosts = len(hostnames)
+        self.unresolvable = sum(1 for hostname in hostnames if is_unresolvable(hostname))
+        slots = asyncio.Semaphore(self.concurrency)
+        host_slots = {}
+        results = []
+        try:
+            probes = [self._probe(url, timeouts.get(url, self.timeout), slots, host_slots) for url in urls]
+            for future in asyncio.as_completed(probes):
+                result = await future
+                if on_result is not None:
+                    on_result(result)
+                results.append(result)
+        finally:
+            close_idle_connections()
+        return results
+
+    # 检测所有url，按完成顺序返回 [ProbeResult, ...]；on_result在主线程里对每个结果调用一次，
+    # timeouts为各url的超时（秒），没有的用self.timeout
+    def run(self, urls, on_result=None, timeouts=None):
+        return asyncio.run(self._run(urls, on_result, timeouts or {}))
@@ -0,0 +1,148 @@
+import json
+import math
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+from iptv import CACHE_DIR
+
+# 直播源检测结果库（SQLite）：每个url记下最近一次的结果、最近几次的响应时间、第一次/最近一次出现的时间、
+# 连续成功/失败的次数，以及下次该检测的时间。每次运行只检测到期的url，
+# whitelist_auto.txt / blacklist_auto.txt 按库里的结果生成
+
+PROBE_STORE_FILE = os.path.join(CACHE_DIR, 'probe.sqlite')
+
+# 检测间隔：连续结果相同的次数越多越稳定，间隔翻倍，最长不超过上限（秒）
+OK_TTL = 6 * 3600
+OK_TTL_MAX = 3 * 24 * 3600
+FAIL_TTL = 2 * 3600
+FAIL_TTL_MAX = 7 * 24 * 3600
+LATENCY_HISTORY = 20       # 保留最近多少次成功的响应时间
+FORGET_AFTER = 30 * 24 * 3600  # 这么久没在任何源里出现过的url从库里删掉
+COMMIT_EVERY = 1000        # 检测结果每这么多条提交一次，中途中断也不会全丢
+
+# 检测超时：按这个url（没有记录时按同一个host）最近几次响应时间的p95乘以系数，限制在最短和最长之间；
+# 从来没有可用记录的用较短的默认值（秒）。只用于http：http的超时按连接、等响应头等每一步算，
+# ffprobe和socket检测（rtmp、rtsp、rtp、p3p等）的超时是整个检测的总时间，缩短了会把能用的源判成失败，仍用原来的固定超时
+TIMEOUT_FACTOR = 3
+TIMEOUT_MIN = 1.0
+TIMEOUT_NEW = 3.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    url TEXT PRIMARY KEY,
+    ok INTEGER,              -- 最近一次检测是否可用，还没检测过为NULL
+    latency REAL,            -- 最近一次可用时的响应时间（毫秒）
+    latencies TEXT,          -- 最近几次可用时的响应时间，JSON数组
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_checked REAL,
+    successes INTEGER NOT NULL DEFAULT 0,  -- 连续可用次数
+    failures INTEGER NOT NULL DEFAULT 0,   -- 连续不可用次数
+    next_check REAL NOT NULL DEFAULT 0
+)
+"""
+
+
+def p95(values):
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * 0.95) - 1)]
+
+def adaptive_timeout(latencies, maximum):
+    if not latencies:
+        return min(TIMEOUT_NEW, maximum)
+    return max(TIMEOUT_MIN, min(maximum, p95(latencies) * TIMEOUT_FACTOR / 1000))
+
+def _host(url):
+    try:
+        return urlsplit(url).netloc
+    except ValueError:
+        return ''
+
+def ttl(ok, streak):
+    if ok:
+        return min(OK_TTL * 2 ** min(streak - 1, 16), OK_TTL_MAX)
+    return min(FAIL_TTL * 2 ** min(streak - 1, 16), FAIL_TTL_MAX)
+
+
+class ProbeStore:
+    """seen() 登记本次出现的url，due() 取出到期要检测的，record() 记下检测结果，
+    entries() 按本次的url读出结果生成whitelist/blacklist，close() 清理过期的url并保存。"""
+
+    def __init__(self, path=PROBE_STORE_FILE):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(_SCHEMA)
+        self.now = time.time()
+        self.pending = 0
+
+    def seen(self, urls):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO probes (url, first_seen, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET last_seen = excluded.last_seen",
+                ((url, self.now, self.now) for url in urls))
+
+    # 还没检测过或已经到期的url，保持传入的顺序
+    def due(self, urls):
+        fresh = {url for url, in self.conn.execute(
+            "SELECT url FROM probes WHERE ok IS NOT NULL AND next_check > ?", (self.now,))}
+        return [url for url in urls if url not in fresh]
+
+    # probed为False（域名不存在、host被熔断，url本身没检测）时本次按失败输出，但不计入连续次数，
+    # 下次检测固定在FAIL_TTL之后：host只是一次运行里连不上，不能让没检测过的url按失败翻倍间隔在黑名单里留好几天
+    def record(self, url, ok, latency=None, checked=None, probed=True):
+        checked = time.time() if checked is None else checked
+        row = self.conn.execute("SELECT successes, failures, latencies FROM probes WHERE url = ?", (url,)).fetchone()
+        successes, failures, latencies = row if row else (0, 0, None)
+        latencies = json.loads(latencies) if latencies else []
+        if not probed:
+            ok = False
+            next_check = checked + FAIL_TTL
+        elif ok:
+            successes, failures = successes + 1, 0
+            latencies = (latencies + [round(latency, 2)])[-LATENCY_HISTORY:]
+            next_check = checked + ttl(True, successes)
+        else:
+            successes, failures = 0, failures + 1
+            next_check = checked + ttl(False, failures)
+        self.conn.execute(
+            "INSERT INTO probes (url, ok, latency, latencies, first_seen, last_seen, last_checked, successes, failures, next_check) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET ok = excluded.ok, latency = COALESCE(excluded.latency, latency), "
+            "latencies = excluded.latencies, last_checked = excluded.last_checked, successes = excluded.successes, "
+            "failures = excluded.failures, next_check = excluded.next_check",
+            (url, int(bool(ok)), latency if ok else None, json.dumps(latencies), checked, checked, checked,
+             successes, failures, next_check))
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.conn.commit()
+            self.pending = 0
+
+    # {url: (是否可用, 响应时间, 最近几次的响应时间)}，只返回检测过的
+    def entries(self, urls):
+        wanted = set(urls)
+        return {url: (bool(ok), latency, json.loads(latencies) if latencies else [])
+                for url, ok, latency, latencies in self.conn.execute(
+                    "SELECT url, ok, latency, latencies FROM probes WHERE ok IS NOT NULL")
+                if url in wanted}
+
+    # {url: 检测超时（秒）}，maximum为原来的固定超时，非http的url一律用它
+    def timeouts(self, urls, maximum):
+        url_latencies = {}
+        host_latencies = {}
+        for url, latencies in self.conn.execute("SELECT url, latencies FROM probes WHERE latencies IS NOT NULL"):
+            latencies = json.loads(latencies)
+            if latencies:
+                url_latencies[url] = latencies
+                host_latencies.setdefault(_host(url), []).extend(latencies)
+        host_latencies.pop('', None)
+        return {url: adaptive_timeout(url_latencies.get(url) or host_latencies.get(_host(url)), maximum)
+                if url.startswith('http') else maximum
+                for url in urls}
+
+    def close(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM probes WHERE last_seen < ?", (self.now - FORGET_AFTER,))
+        self.conn.close()
@@ -0,0 +1,33 @@
+import os
+
+# 输出文件发布：每个产物只生成一次，先写临时文件再os.replace到目标路径，
+# 前端不会读到写了一半的文件；内容相同的多个目标（如merged_output.txt和live.txt），
+# 第一个写好后其余用硬链接，不支持硬链接时再写一遍
+
+
+# txt产物：每个元素（字符串或Channel记录）一行
+def render_txt(lines):
+    return ''.join(f"{line}\n" for line in lines)
+
+def _write_tmp(tmp_path, data):
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+
+def publish(text, paths):
+    data = text.encode('utf-8')
+    published = None
+    for path in paths:
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        if published is None:
+            _write_tmp(tmp_path, data)
+        else:
+            try:
+                os.link(published, tmp_path)
+            except OSError:
+                _write_tmp(tmp_path, data)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+        published = path
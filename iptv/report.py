@@ -0,0 +1,55 @@
+import json
+import os
+import time
+from datetime import datetime
+
+# 运行报告：每个阶段的耗时（墙钟和CPU）、每个源的下载/解析/分发计数、每个分类的记录数和组装耗时，
+# 写成JSON放在输出文件旁边，用来找出是哪个源、哪个阶段在拖慢定时任务
+
+RUN_REPORT_FILE = 'run_report.json'
+
+
+class RunReport:
+    """lap() 结束一个阶段并记下它的耗时，source()/category() 取出对应的计数dict（没有时新建），save() 写出JSON。"""
+
+    def __init__(self):
+        self.started = datetime.now()
+        self._start = self._lap = time.perf_counter()
+        self._start_cpu = self._lap_cpu = time.process_time()
+        self.stages = {}
+        self.sources = {}
+        self.categories = {}
+
+    # main()是按顺序执行的，阶段 = 上一次lap到这一次lap之间；CPU时间包括下载线程
+    def lap(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        self.stages[name] = {'wall': round(wall - self._lap, 3), 'cpu': round(cpu - self._lap_cpu, 3)}
+        self._lap, self._lap_cpu = wall, cpu
+
+    def source(self, url):
+        return self.sources.setdefault(url, {})
+
+    def category(self, key):
+        return self.categories.setdefault(key, {})
+
+    def to_dict(self, **extra):
+        return {
+            'started': self.started.strftime("%Y%m%d %H:%M:%S"),
+            'total': {'wall': round(time.perf_counter() - self._start, 3),
+                      'cpu': round(time.process_time() - self._start_cpu, 3)},
+            'stages': self.stages,
+            'sources': self.sources,
+            'categories': self.categories,
+            **extra,
+        }
+
+    # 报告写失败不影响输出结果
+    def save(self, path=RUN_REPORT_FILE, **extra):
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(**extra), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"运行报告写入失败：{e}")
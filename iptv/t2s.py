@@ -0,0 +1,59 @@
+import functools
+import json
+import os
+import threading
+
+from iptv import CACHE_DIR
+
+# 繁转简：全进程共用一个OpenCC转换器（原来每行都 opencc.OpenCC('t2s') 重新加载字典），
+# 结果按频道名做LRU缓存；可选的磁盘缓存让上次运行见过的名称直接跳过OpenCC。
+# opencc第一次转换时才import，只用到iptv其他模块的脚本不需要安装它
+
+T2S_CACHE_FILE = os.path.join(CACHE_DIR, 't2s.json')
+
+_converter = None
+_converter_lock = threading.Lock()
+
+_disk_cache = {}   # 上次运行保存的 {原名: 简体名}
+_seen = {}         # 本次运行用到的，save_cache时只保存这些，避免缓存文件无限增长
+
+
+def _get_converter():
+    global _converter
+    if _converter is None:
+        with _converter_lock:
+            if _converter is None:
+                import opencc #简繁转换
+                converter = opencc.OpenCC('t2s')
+                converter.convert('')  # 字典是第一次convert时才加载的，先在锁里加载好
+                _converter = converter
+    return _converter
+
+# 只含ASCII和拉丁字母（U+0250以下）的名称，OpenCC不会有任何改动
+def _is_latin(text):
+    return text.isascii() or all(char < 'ɐ' for char in text)
+
+@functools.lru_cache(maxsize=65536)
+def traditional_to_simplified(text: str) -> str:
+    if _is_latin(text):
+        return text
+    simplified_text = _disk_cache.get(text)
+    if simplified_text is None:
+        simplified_text = _get_converter().convert(text)
+    _seen[text] = simplified_text
+    return simplified_text
+
+# 读入磁盘缓存，文件不存在或损坏时当作空缓存
+def load_cache(path=T2S_CACHE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            _disk_cache.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+def save_cache(path=T2S_CACHE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(_seen, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)